@@ -2,6 +2,7 @@ import React from 'react';
 import { Event } from '../types';
 import { formatSingleDateTime } from '../utils/dateUtils';
 import { CalendarIcon, LocationIcon, PencilIcon, TrashIcon, RestoreIcon } from './icons';
+import ResponsiveImage from './ResponsiveImage';
 
 interface EventListProps {
     events: Event[];
@@ -46,8 +47,10 @@ const EventList: React.FC<EventListProps> = ({
                 {events.map(event => (
                     <article key={event.id} className="event-card">
                         <div className="event-card-image-wrapper" onClick={() => onViewDetails(event)}>
-                            <img
+                            <ResponsiveImage
                                 src={event.image_url || '/assets/main/card-background.png'}
+                                variants={event.image_variants}
+                                variant="card"
                                 alt={event.title}
                                 className="event-card-image"
                                 loading="lazy"
@@ -4,8 +4,11 @@ import '../styles/Header.css';
 import '../styles/NotificationDropdown.css';
 import { BellIcon, UserPlaceholderIcon } from './icons';
 import NotificationDropdown from './NotificationDropdown';
+import ResponsiveImage from './ResponsiveImage';
 import { useAuth } from '../context/AuthContext';
 
+const NOTIFICATIONS_PAGE_SIZE = 20;
+
 interface HeaderProps {
   user: User | null;
   onLogoutClick: () => void;
@@ -46,13 +49,17 @@ const Header: React.FC<HeaderProps> = ({
     if (!user) return;
 
     try {
-      const response = await fetchWithAuth('/api/notifications');
-      if (response.ok) {
+      const [response, countResponse] = await Promise.all([
+        fetchWithAuth(`/api/notifications?limit=${NOTIFICATIONS_PAGE_SIZE}`),
+        fetchWithAuth('/api/notifications/unread-count'),
+      ]);
+      if (response.ok && countResponse.ok) {
         const data = await response.json();
-        setNotifications(data);
-        setUnreadCount(data.filter((n: Notification) => !n.is_read).length);
+        const countData = await countResponse.json();
+        setNotifications(data.items);
+        setUnreadCount(countData.unread_count);
       } else {
-          console.error("Failed to fetch notifications:", response.status, await response.text());
+          console.error("Failed to fetch notifications:", response.status, countResponse.status);
       }
     } catch (error) {
       console.error("Ошибка при загрузке уведомлений:", error);
@@ -72,7 +79,12 @@ const Header: React.FC<HeaderProps> = ({
   const handleMarkAsRead = async () => {
     if (unreadCount === 0) return;
     try {
-      await fetchWithAuth('/api/notifications/mark-as-read', { method: 'POST' });
+      const newestShown = notifications[0]?.created_at;
+      await fetchWithAuth('/api/notifications/mark-as-read', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(newestShown ? { up_to: newestShown } : {}),
+      });
       fetchNotifications();
     } catch (error) {
       console.error("Ошибка при пометке уведомлений как прочитанных:", error);
@@ -175,7 +187,7 @@ const Header: React.FC<HeaderProps> = ({
             aria-expanded={isUserDropdownOpen}
           >
             {userAvatar ? (
-              <img src={userAvatar} alt={user?.username || 'Аватар пользователя'} className="header-user-avatar" />
+              <ResponsiveImage src={userAvatar} variants={user?.avatarVariants} variant="thumb" alt={user?.username || 'Аватар пользователя'} className="header-user-avatar" />
             ) : (
               <UserPlaceholderIcon />
             )}
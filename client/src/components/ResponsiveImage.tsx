@@ -0,0 +1,23 @@
+import React from 'react';
+import { ImageVariantName, ImageVariants } from '../types';
+
+interface ResponsiveImageProps extends React.ImgHTMLAttributes<HTMLImageElement> {
+    src: string;
+    variants?: ImageVariants | null;
+    variant: ImageVariantName;
+}
+
+const ResponsiveImage: React.FC<ResponsiveImageProps> = ({ src, variants, variant, alt, ...imgProps }) => {
+    const sized = variants?.[variant];
+    if (!sized) {
+        return <img src={src} alt={alt} {...imgProps} />;
+    }
+    return (
+        <picture>
+            <source srcSet={sized.webp} type="image/webp" />
+            <img src={sized.jpeg} alt={alt} {...imgProps} />
+        </picture>
+    );
+};
+
+export default ResponsiveImage;
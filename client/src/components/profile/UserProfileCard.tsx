@@ -2,6 +2,7 @@ import React, { useState, useRef, useEffect } from 'react';
 import { useForm } from 'react-hook-form';
 import { User } from '../../types';
 import { PencilIcon, UserPlaceholderIcon } from '../icons';
+import ResponsiveImage from '../ResponsiveImage';
 import '../../styles/profile/UserProfileCard.css';
 
 interface UserProfileCardProps {
@@ -59,8 +60,10 @@ const UserProfileCard: React.FC<UserProfileCardProps> = ({ user, stats, onAvatar
             <div className="profile-user-main">
                 <div className={`profile-avatar-wrapper ${isAvatarUploading ? 'uploading' : ''}`} onClick={handleAvatarClick}>
                     {user.avatarUrl ? (
-                         <img
+                         <ResponsiveImage
                             src={user.avatarUrl}
+                            variants={user.avatarVariants}
+                            variant="card"
                             alt="Аватар"
                             className="profile-avatar"
                         />
@@ -137,6 +137,12 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
             const errorData = await response.json();
             throw new Error(errorData.error || 'Не удалось сменить пароль');
         }
+
+        const data = await response.json();
+        if (data.access_token) {
+            localStorage.setItem('authToken', data.access_token);
+            setToken(data.access_token);
+        }
     };
     
     const value = {
@@ -20,22 +20,28 @@ export enum ParticipantRole {
   ORGANIZER = "Организатор"
 }
 
+export type ImageVariantName = 'thumb' | 'card' | 'full';
+
+export type ImageVariants = Record<ImageVariantName, { webp: string; jpeg: string }>;
+
 export interface User {
   id: number;
   username: string;
   email: string;
   is_admin: boolean;
   avatarUrl?: string | null;
+  avatarVariants?: ImageVariants | null;
   notifications_enabled: boolean;
 }
 
 export interface Notification {
-  id: number;
+  id: number | string;
   message: string;
   is_read: boolean;
   created_at: string;
   event_id: number | null;
   event_title: string | null;
+  is_broadcast?: boolean;
 }
 
 export interface Event {
@@ -52,6 +58,7 @@ export interface Event {
   registration_link_volunteer?: string | null;
   registration_link_organizer?: string | null;
   image_url?: string | null;
+  image_variants?: ImageVariants | null;
   created_at: string;
   updated_at: string;
   author_id: number;
@@ -73,6 +80,7 @@ export interface Participation {
   event_start_datetime: string;
   event_end_datetime?: string | null;
   event_image_url?: string | null;
+  event_image_variants?: ImageVariants | null;
   event_location: EventLocation;
 }
 
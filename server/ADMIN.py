@@ -2,6 +2,7 @@ import argparse
 import sys
 from app import app
 from models import db, User
+from identity import bump_auth_version
 
 def make_admin(email):
     print(f"Попытка сделать пользователя '{email}' администратором...")
@@ -13,6 +14,7 @@ def make_admin(email):
                 print(f"Пользователь '{user.username}' ({user.email}) уже является администратором.")
             else:
                 user.is_admin = True
+                bump_auth_version(user)
                 db.session.add(user)
                 db.session.commit()
                 print(f"Успешно! Пользователь '{user.username}' ({user.email}) теперь администратор.")
@@ -1,21 +1,44 @@
 import logging
+import os
+import sys
+import click
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager, get_jwt_identity, decode_token 
 from jwt.exceptions import DecodeError, InvalidTokenError 
 from flask_socketio import SocketIO, join_room 
+from werkzeug.middleware.proxy_fix import ProxyFix
 from apscheduler.schedulers.background import BackgroundScheduler
-import pytz 
 from datetime import datetime, timedelta, timezone 
 
 from config import Config
 from auth_routes import register_auth_routes
-from models import db, bcrypt, Event, Role, ParticipantRoleEnum, User, Participation, Notification 
+from models import db, bcrypt, Role, ParticipantRoleEnum, as_utc 
 from logging_config import setup_logging
+from db_metrics import init_query_counter
 from event_routes import register_event_routes
 from notification_routes import register_notification_routes
 from participation_routes import register_participation_routes 
+from job_routes import register_job_routes
+from job_queue import JobWorkerPool
+from search_index import ensure_search_schema, rebuild_search_index
+from reminders import upcoming_events_to_notify_query, reminder_message, local_start_time
+from reminder_delivery import deliver_participation_reminders
+from query_plans import check_query_plans
+from event_lifecycle import advance_event_statuses, recompute_all_event_statuses
+from listing_cache import events_listing_cache
+from broadcasts import publish_broadcast, open_missing_opt_outs
+from notification_counters import recount_unread_notifications
+from notification_retention import enforce_notification_retention
+from reminder_scheduler import install_reminder_scheduler
+from scheduler_lease import LeaderElection, get_lease
+from blocking_calls import configure_blocking_offload
+from identity import init_identity, load_identity
+from user_import import import_users
+from rate_limiting import login_rate_limiter
+from images import IMAGE_OWNERS, queue_image_variants
+from upload_storage import is_immutable_upload, IMMUTABLE_UPLOAD_MAX_AGE
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -23,22 +46,31 @@ logger = logging.getLogger(__name__)
 async_mode = 'eventlet'
 app = Flask(__name__)
 app.config.from_object(Config)
+if Config.TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.TRUSTED_PROXY_HOPS, x_proto=Config.TRUSTED_PROXY_HOPS)
 
 if not app.config.get('SECRET_KEY'):
     logger.error("FLASK_SECRET_KEY не установлен! SocketIO может работать некорректно.")
 
 socketio = SocketIO(app, cors_allowed_origins=Config.CORS_ORIGINS, async_mode=async_mode)
+configure_blocking_offload(
+    Config.BLOCKING_OFFLOAD == 'on' or (Config.BLOCKING_OFFLOAD == 'auto' and socketio.async_mode == 'eventlet'),
+    Config.BLOCKING_POOL_THREADS
+)
 
 CORS(app, resources={r"/api/*": {"origins": Config.CORS_ORIGINS}}, supports_credentials=True)
 db.init_app(app)
 bcrypt.init_app(app)
 jwt = JWTManager(app)
+init_identity(jwt)
 migrate = Migrate(app, db)
+init_query_counter(app)
 
 register_auth_routes(app)
 register_event_routes(app, socketio)
 register_notification_routes(app)
 register_participation_routes(app) 
+register_job_routes(app)
 
 @app.cli.command("init-db")
 def init_db_command():
@@ -48,129 +80,231 @@ def init_db_command():
             db.session.add(Role(name=role_enum))
             print(f"Role '{role_enum.value}' created.")
     db.session.commit()
+    ensure_search_schema()
     print("Database initialized and roles populated.")
 
+@app.cli.command("import-users")
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', type=int, default=None, help='Rows per bulk insert.')
+@click.option('--workers', type=int, default=None, help='Password hashing processes.')
+def import_users_command(csv_path, chunk_size, workers):
+    def report_progress(report):
+        print(f"Chunk {report['chunks']}: {report['read']} rows read, {report['created']} created, "
+              f"{report['skipped']} skipped, {report['invalid']} invalid.")
+
+    try:
+        with open(csv_path, newline='', encoding='utf-8-sig') as csv_file:
+            report = import_users(csv_file, chunk_size, workers, on_chunk=report_progress)
+    except ValueError as e:
+        print(f"Import failed: {e}")
+        sys.exit(1)
+    print(
+        f"Users imported: {report['created']} created, {report['skipped']} skipped, {report['invalid']} invalid "
+        f"of {report['read']} rows in {report['duration_seconds']}s "
+        f"({report['users_per_second']} users/s, {report['workers']} hashing processes)."
+    )
+
+@app.cli.command("generate-image-variants")
+def generate_image_variants_command():
+    queued = 0
+    for kind, (model, url_attribute, variants_attribute) in IMAGE_OWNERS.items():
+        owners = db.session.query(model.id, getattr(model, url_attribute)).filter(
+            getattr(model, url_attribute).isnot(None),
+            getattr(model, variants_attribute).is_(None)
+        ).all()
+        for owner_id, source_url in owners:
+            queue_image_variants(kind, owner_id, source_url)
+            queued += 1
+    db.session.commit()
+    print(f"Image variant jobs queued: {queued}.")
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    indexed = rebuild_search_index()
+    print(f"Search index rebuilt: {indexed} events indexed.")
+
+@app.cli.command("refresh-event-statuses")
+def refresh_event_statuses_command():
+    changed = recompute_all_event_statuses()
+    print(f"Event statuses recomputed: {changed} events changed.")
+
+@app.cli.command("recount-unread-notifications")
+def recount_unread_notifications_command():
+    corrected = recount_unread_notifications()
+    print(f"Unread notification counters recomputed: {corrected} users corrected.")
+
+@app.cli.command("backfill-notification-opt-outs")
+def backfill_notification_opt_outs_command():
+    opened = open_missing_opt_outs()
+    print(f"Notification opt-out periods opened for {opened} users.")
+
+@app.cli.command("prune-notifications")
+def prune_notifications_command():
+    report = enforce_notification_retention()
+    print(
+        f"Notifications reclaimed: {report['reclaimed']} "
+        f"({report['expired']} expired, {report['over_cap']} over cap for {report['trimmed_users']} users) "
+        f"in {report['duration_seconds']}s."
+    )
+
+@app.cli.command("scheduler-status")
+def scheduler_status_command():
+    lease = get_lease(Config.SCHEDULER_LEASE_NAME)
+    if not lease:
+        print(f"Lease '{Config.SCHEDULER_LEASE_NAME}' has never been acquired.")
+        return
+    expired = as_utc(lease.expires_at) < datetime.now(timezone.utc)
+    print(f"Lease '{lease.name}': holder {lease.holder}, renewed at {lease.renewed_at.isoformat()}, "
+          f"expires at {lease.expires_at.isoformat()}{' (expired)' if expired else ''}")
+
+@app.cli.command("create-indexes")
+def create_indexes_command():
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+            print(f"Index '{index.name}' on '{table.name}' is in place.")
+
+@app.cli.command("check-query-plans")
+def check_query_plans_command():
+    results = check_query_plans()
+    for result in results:
+        status = "FULL SCAN" if result['full_scans'] else "OK"
+        print(f"[{status}] {result['name']}")
+        for line in result['plan']:
+            print(f"    {line}")
+    failed = [result['name'] for result in results if result['full_scans']]
+    if failed:
+        print(f"Full scans detected in: {', '.join(failed)}")
+        sys.exit(1)
+    print("All hot queries are served by indexes.")
+
 @app.route('/uploads/<path:filename>')
 def serve_upload(filename):
+    if is_immutable_upload(filename):
+        response = send_from_directory(Config.UPLOAD_FOLDER, filename, max_age=IMMUTABLE_UPLOAD_MAX_AGE)
+        response.headers['Cache-Control'] = f"public, max-age={IMMUTABLE_UPLOAD_MAX_AGE}, immutable"
+        return response
     return send_from_directory(Config.UPLOAD_FOLDER, filename)
 
-def to_krasnoyarsk_time(dt_utc: datetime) -> datetime:
-    krasnoyarsk_tz = pytz.timezone('Asia/Krasnoyarsk')
-    if dt_utc.tzinfo is None:
-        dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-    return dt_utc.astimezone(krasnoyarsk_tz)
+def emit_participation_reminder(reminder: dict):
+    socketio.emit('upcoming_event_for_user', {
+        'eventId': reminder['event_id'],
+        'title': 'Скоро начнется!',
+        'message': reminder['message'],
+    }, room=str(reminder['user_id']))
 
-def check_upcoming_events():
+def check_upcoming_events(event_id=None, attempt=0):
     with app.app_context():
         now_utc = datetime.now(timezone.utc)
-    
-        reminder_start_window = now_utc + timedelta(hours=20)
-        reminder_end_window = now_utc + timedelta(hours=28)
         
-        upcoming_events_general_notify = Event.query.filter(
-            Event.start_datetime >= reminder_start_window,
-            Event.start_datetime <= reminder_end_window,
-            Event.is_archived == False,
-            Event.notification_sent_at.is_(None) 
-        ).all()
+        failures = 0
+        try:
+            upcoming_events_general_notify = upcoming_events_to_notify_query(now_utc, event_id).all()
+        except Exception as e:
+            logger.error(f"Ошибка при выборке событий для общего уведомления: {e}", exc_info=True)
+            db.session.rollback()
+            upcoming_events_general_notify = []
+            failures += 1
 
         if upcoming_events_general_notify:
             logger.info(f"Найдены предстоящие события для общего уведомления: {[e.id for e in upcoming_events_general_notify]}")
 
         for event in upcoming_events_general_notify:
             try:
-                local_start_time = to_krasnoyarsk_time(event.start_datetime).strftime('%d.%m.%Y в %H:%M')
+                notification_message = reminder_message(event)
+                broadcast, created = publish_broadcast(event.id, notification_message, timedelta(days=2))
+                logger.info(f"Broadcast reminder {broadcast.id} {'created' if created else 'already exists'} for event {event.id}.")
+
+                event.notification_sent_at = now_utc
+                db.session.add(event) 
+                db.session.commit() 
+                logger.info(f"DB notifications created and event {event.id} marked as notified.")
 
                 socketio.emit('upcoming_event', { 
                     'eventId': event.id,
                     'title': 'Скоро начнется!',
-                    'message': f"Мероприятие '{event.title}' начнется {local_start_time}."
+                    'message': f"Мероприятие '{event.title}' начнется {local_start_time(event)}."
                 })
                 logger.info(f"Socket.IO 'upcoming_event' emitted for event {event.id}")
 
-                users_for_db_notify = User.query.filter_by(is_admin=False, notifications_enabled=True).all()
-                db_notifications = []
-                notification_message = f"Напоминание: Мероприятие «{event.title}» начнется {local_start_time}."
-                for user_to_notify in users_for_db_notify:
-                    existing_general_notification = Notification.query.filter(
-                        Notification.user_id == user_to_notify.id,
-                        Notification.event_id == event.id,
-                        Notification.message == notification_message,
-                        Notification.created_at > (now_utc - timedelta(days=2))
-                    ).first()
-
-                    if not existing_general_notification:
-                        db_notifications.append(Notification(
-                            user_id=user_to_notify.id,
-                            message=notification_message,
-                            event_id=event.id
-                        ))
-                    else:
-                        logger.debug(f"Skipping duplicate general DB notification for user {user_to_notify.id} for event {event.id}.")
-
-                if db_notifications:
-                    db.session.add_all(db_notifications)
-
-                event.notification_sent_at = now_utc
-                db.session.add(event) 
-                db.session.commit() 
-                logger.info(f"DB notifications created and event {event.id} marked as notified.")
-
             except Exception as e:
                  logger.error(f"Ошибка при обработке общего уведомления для события ID {event.id}: {e}", exc_info=True)
                  db.session.rollback() 
+                 failures += 1
                  continue 
 
-        upcoming_participations_to_notify = Participation.query.join(Event).join(User).filter(
-            Event.start_datetime >= reminder_start_window,
-            Event.start_datetime <= reminder_end_window,
-            Event.is_archived == False,
-            User.notifications_enabled == True,
-            Participation.reminder_sent_at.is_(None)
-        ).all()
+        metrics = deliver_participation_reminders(now_utc, event_id, on_delivered=emit_participation_reminder)
+        failures += metrics['failures']
+        if failures and event_id is not None:
+            reminder_scheduler.schedule_retry(event_id, attempt + 1)
 
-        if upcoming_participations_to_notify:
-            logger.info(f"Найдены предстоящие участия для уведомления: {[p.id for p in upcoming_participations_to_notify]}")
+        logger.info(f"Checked upcoming event and participation notifications{f' for event {event_id}' if event_id else ''}.")
 
-        for participation in upcoming_participations_to_notify:
-            event = participation.event
-            user_to_notify = participation.user
-            
-            try:
-                local_start_time = to_krasnoyarsk_time(event.start_datetime).strftime('%d.%m.%Y в %H:%M')
-                notification_message = f"Напоминание: Мероприятие «{event.title}» начнется {local_start_time}." 
-                
-                notification = Notification(
-                    user_id=user_to_notify.id,
-                    message=notification_message,
-                    event_id=event.id
-                )
-                db.session.add(notification)
-
-                participation.reminder_sent_at = now_utc
-                db.session.add(participation)
 
-                db.session.commit() 
-                logger.info(f"Created DB notification for user {user_to_notify.id} for event {event.id} (participation reminder).")
+def sweep_event_statuses():
+    with app.app_context():
+        try:
+            transitioned = advance_event_statuses()
+            if transitioned['ongoing'] or transitioned['finished']:
+                events_listing_cache.invalidate()
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении статусов мероприятий: {e}", exc_info=True)
+            db.session.rollback()
+
+def prune_notifications():
+    with app.app_context():
+        try:
+            enforce_notification_retention()
+        except Exception as e:
+            logger.error(f"Ошибка при очистке старых уведомлений: {e}", exc_info=True)
+            db.session.rollback()
 
-                socketio.emit('upcoming_event_for_user', {
-                    'eventId': event.id,
-                    'title': 'Скоро начнется!',
-                    'message': notification_message,
-                }, room=str(user_to_notify.id)) 
-                logger.info(f"Socket.IO 'upcoming_event_for_user' emitted to room {user_to_notify.id} for event {event.id}.")
+def prune_login_rate_limits():
+    with app.app_context():
+        try:
+            login_rate_limiter.prune()
+        except Exception as e:
+            logger.error(f"Ошибка при очистке счётчиков попыток входа: {e}", exc_info=True)
 
-            except Exception as e:
-                db.session.rollback() 
-                logger.error(f"Failed to send participation reminder for user {user_to_notify.id} event {event.id}: {e}", exc_info=True)
 
-        logger.info("Checked for all upcoming events and participation notifications.")
+scheduler = BackgroundScheduler(daemon=True)
+reminder_scheduler = install_reminder_scheduler(scheduler, check_upcoming_events)
+scheduler.add_job(sweep_event_statuses, 'interval', seconds=Config.EVENT_STATUS_SWEEP_SECONDS)
+scheduler.add_job(prune_notifications, 'interval', minutes=Config.NOTIFICATION_RETENTION_INTERVAL_MINUTES)
+scheduler.add_job(prune_login_rate_limits, 'interval', minutes=Config.LOGIN_RATE_LIMIT_PRUNE_MINUTES)
+
+def on_scheduler_elected():
+    try:
+        reminder_scheduler.rebuild()
+    except Exception as e:
+        logger.error(f"Не удалось построить расписание напоминаний: {e}", exc_info=True)
+        db.session.rollback()
+    scheduler.resume()
+    logger.info("Планировщик уведомлений запущен.")
 
+def on_scheduler_demoted():
+    scheduler.pause()
+    logger.info("Планировщик уведомлений приостановлен.")
 
-scheduler = BackgroundScheduler(daemon=True)
-scheduler.add_job(check_upcoming_events, 'interval', minutes=5)
-scheduler.start()
-logger.info("Планировщик уведомлений запущен.")
+def on_scheduler_heartbeat():
+    try:
+        reminder_scheduler.refresh_if_changed()
+    except Exception as e:
+        logger.error(f"Не удалось обновить расписание напоминаний: {e}", exc_info=True)
+        db.session.rollback()
+
+scheduler_election = LeaderElection(
+    app, Config.SCHEDULER_LEASE_NAME, Config.SCHEDULER_LEASE_TTL_SECONDS, Config.SCHEDULER_HEARTBEAT_SECONDS,
+    on_elected=on_scheduler_elected, on_demoted=on_scheduler_demoted, on_heartbeat=on_scheduler_heartbeat
+)
+
+job_workers = JobWorkerPool(app, Config.JOB_WORKERS, Config.JOB_POLL_SECONDS)
+
+def start_background_services():
+    if not scheduler.running:
+        scheduler.start(paused=True)
+        scheduler_election.start()
+    job_workers.start()
 
 @app.context_processor
 def inject_user_id():
@@ -200,8 +334,8 @@ def authenticate_user(data):
         decoded_token = decode_token(token)
         user_id = decoded_token['sub'] 
         
-        user = User.query.get(user_id)
-        if user:
+        user = load_identity(user_id)
+        if user and decoded_token.get('ver') == user.auth_version:
             join_room(str(user.id))
             logger.info(f"User {user.id} joined room {user.id} with SID {request.sid}")
             socketio.emit('auth_success', {'message': 'Authenticated', 'userId': user.id}, room=request.sid)
@@ -217,4 +351,6 @@ def authenticate_user(data):
 
 if __name__ == '__main__':
     logger.info("Запуск Flask-SocketIO приложения...")
+    if not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
     socketio.run(app, debug=Config.DEBUG, host='0.0.0.0', port=5000, use_reloader=Config.DEBUG)
\ No newline at end of file
@@ -2,11 +2,17 @@ from flask import request, jsonify
 from models import db, User
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 import logging
-import os
-import uuid
+import math
 from werkzeug.utils import secure_filename
-from config import Config
-from event_routes import _delete_image_file, allowed_file
+from event_routes import allowed_file
+from listing_cache import events_listing_cache
+from identity import token_claims, invalidate_identity, bump_auth_version, is_admin_request
+from rate_limiting import login_rate_limiter
+from images import queue_image_variants, is_valid_image
+from blocking_calls import run_blocking
+from upload_storage import save_upload, discard_upload, release_upload
+from broadcasts import set_notifications_enabled
+from job_queue import notify_workers
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +39,7 @@ def register_auth_routes(app):
             return jsonify({"error": "Имя пользователя уже используется"}), 409
 
         try:
+            db.session.close()
             new_user = User(username=username, email=email)
             new_user.set_password(password)
             db.session.add(new_user)
@@ -53,11 +60,21 @@ def register_auth_routes(app):
 
         if not email or not password:
             return jsonify({"error": "Email и пароль обязательны"}), 400
+        if not isinstance(email, str) or not isinstance(password, str):
+            return jsonify({"error": "Email и пароль должны быть строками"}), 400
+
+        retry_after = login_rate_limiter.check(request.remote_addr, email)
+        if retry_after > 0:
+            response = jsonify({"error": "Слишком много попыток входа. Повторите позже"})
+            response.headers['Retry-After'] = str(math.ceil(retry_after))
+            return response, 429
 
         user = User.query.filter_by(email=email).first()
+        db.session.close()
 
         if user and user.check_password(password):
-            access_token = create_access_token(identity=str(user.id))
+            login_rate_limiter.record_success(email)
+            access_token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
             logger.info(f"User logged in: {user.username} ({email})")
             return jsonify(
                 access_token=access_token,
@@ -67,6 +84,13 @@ def register_auth_routes(app):
             logger.warning(f"Failed login attempt for email: {email}")
             return jsonify({"error": "Неверный email или пароль"}), 401
 
+    @app.route('/api/login/rate-limit-stats', methods=['GET'])
+    @jwt_required()
+    def get_login_rate_limit_stats():
+        if not is_admin_request():
+            return jsonify({"error": "Требуются права администратора"}), 403
+        return jsonify(login_rate_limiter.stats()), 200
+
     @app.route('/api/me', methods=['GET', 'PUT'])
     @jwt_required()
     def handle_me():
@@ -85,11 +109,13 @@ def register_auth_routes(app):
                 return jsonify({"error": "Нет данных для обновления"}), 400
 
             try:
+                username_changed = False
                 if 'username' in data and data['username'] != user.username:
                     existing_user = User.query.filter(User.username == data['username'], User.id != user.id).first()
                     if existing_user:
                         return jsonify({"error": "Имя пользователя уже занято"}), 409
                     user.username = data['username']
+                    username_changed = True
 
                 if 'email' in data and data['email'] != user.email:
                     existing_user = User.query.filter(User.email == data['email'], User.id != user.id).first()
@@ -98,6 +124,9 @@ def register_auth_routes(app):
                     user.email = data['email']
                 
                 db.session.commit()
+                invalidate_identity(user.id)
+                if username_changed and user.is_admin:
+                    events_listing_cache.invalidate()
                 logger.info(f"User profile updated for user ID: {user.id}")
                 return jsonify(user=user.to_dict()), 200
 
@@ -123,29 +152,33 @@ def register_auth_routes(app):
             return jsonify({"error": "Файл не выбран"}), 400
 
         if file and allowed_file(file.filename):
+            if not run_blocking(is_valid_image, file.stream):
+                return jsonify({"error": "Файл не является изображением"}), 400
+            avatar_url = None
             try:
                 old_avatar_url = user.avatar_url
                 
-                if not os.path.exists(Config.UPLOAD_FOLDER):
-                    os.makedirs(Config.UPLOAD_FOLDER)
-                
                 filename = secure_filename(file.filename)
                 ext = filename.rsplit('.', 1)[1].lower()
-                unique_filename = f"avatar-{user.id}-{uuid.uuid4().hex}.{ext}"
-                filepath = os.path.join(Config.UPLOAD_FOLDER, unique_filename)
-                
-                file.save(filepath)
+                avatar_url = save_upload(file, ext)
+                if avatar_url == old_avatar_url:
+                    db.session.rollback()
+                    return jsonify(user=user.to_dict()), 200
                 
-                user.avatar_url = f"/uploads/{unique_filename}"
+                user.avatar_url = avatar_url
+                user.avatar_variants = None
+                queue_image_variants('avatar', user.id, user.avatar_url)
                 db.session.commit()
+                notify_workers()
                 
-                _delete_image_file(old_avatar_url)
+                release_upload(old_avatar_url)
                 
                 logger.info(f"Avatar uploaded for user {user.id}. New path: {user.avatar_url}")
                 return jsonify(user=user.to_dict()), 200
 
             except Exception as e:
                 db.session.rollback()
+                discard_upload(avatar_url)
                 logger.error(f"Error uploading avatar for user {user.id}: {e}", exc_info=True)
                 return jsonify({"error": "Ошибка при сохранении файла"}), 500
         else:
@@ -165,7 +198,8 @@ def register_auth_routes(app):
         
         if not current_password or not new_password:
             return jsonify({"error": "Необходимо указать текущий и новый пароли"}), 400
-            
+
+        db.session.close()
         if not user.check_password(current_password):
             return jsonify({"error": "Неверный текущий пароль"}), 403
 
@@ -174,9 +208,13 @@ def register_auth_routes(app):
 
         try:
             user.set_password(new_password)
+            bump_auth_version(user)
+            db.session.add(user)
             db.session.commit()
+            invalidate_identity(user.id)
+            access_token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
             logger.info(f"Password changed successfully for user ID: {user.id}")
-            return jsonify({"message": "Пароль успешно изменен"}), 200
+            return jsonify({"message": "Пароль успешно изменен", "access_token": access_token}), 200
         except Exception as e:
             db.session.rollback()
             logger.error(f"Error changing password for user {user.id}: {e}", exc_info=True)
@@ -196,9 +234,10 @@ def register_auth_routes(app):
         
         try:
             if 'notifications_enabled' in data and isinstance(data['notifications_enabled'], bool):
-                user.notifications_enabled = data['notifications_enabled']
+                set_notifications_enabled(user, data['notifications_enabled'])
 
             db.session.commit()
+            invalidate_identity(user.id)
             logger.info(f"User settings updated for user ID: {user.id}. Notifications enabled: {user.notifications_enabled}")
             return jsonify(user=user.to_dict()), 200
 
@@ -0,0 +1,114 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+def legacy_fan_out(event_id, message, dedup_window):
+    from models import db, User, Notification
+    users = User.query.filter_by(is_admin=False, notifications_enabled=True).all()
+    notifications = []
+    for user in users:
+        existing = Notification.query.filter(
+            Notification.user_id == user.id,
+            Notification.event_id == event_id,
+            Notification.message == message,
+            Notification.created_at > (datetime.now(timezone.utc) - dedup_window)
+        ).first()
+        if not existing:
+            notifications.append(Notification(user_id=user.id, message=message, event_id=event_id))
+    db.session.add_all(notifications)
+    return len(notifications)
+
+def bulk_fan_out(event_id, message, dedup_window):
+    from sqlalchemy import select, insert, update, exists, and_, literal, Boolean, DateTime, Integer, String
+    from models import db, User, Notification
+    now_utc = datetime.now(timezone.utc)
+    already_notified = exists().where(
+        Notification.user_id == User.id,
+        Notification.event_id == event_id,
+        Notification.message == message,
+        Notification.created_at > now_utc - dedup_window
+    )
+    recipient_filter = and_(
+        User.is_admin == False,
+        User.notifications_enabled == True,
+        ~already_notified
+    )
+    db.session.execute(
+        update(User)
+        .where(recipient_filter)
+        .values(unread_notifications_count=User.unread_notifications_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    recipients = select(
+        User.id,
+        literal(message, type_=String),
+        literal(False, type_=Boolean),
+        literal(now_utc, type_=DateTime),
+        literal(event_id, type_=Integer)
+    ).where(recipient_filter)
+    result = db.session.execute(
+        insert(Notification).from_select(['user_id', 'message', 'is_read', 'created_at', 'event_id'], recipients)
+    )
+    return result.rowcount
+
+def seed(user_count):
+    from models import db, User, Event, EventLocation, EventType
+    db.drop_all()
+    db.create_all()
+    db.session.execute(db.insert(User), [
+        {'username': f'bench-user-{i}', 'email': f'bench-user-{i}@example.com', 'password_hash': 'x',
+         'is_admin': i == 0, 'notifications_enabled': True, 'created_at': datetime.now(timezone.utc)}
+        for i in range(user_count + 1)
+    ])
+    event = Event(
+        title='Benchmark', description='Benchmark', start_datetime=datetime.now(timezone.utc) + timedelta(days=1),
+        location=EventLocation.OTHER, event_type=EventType.OTHER, author_id=1
+    )
+    db.session.add(event)
+    db.session.commit()
+    return event.id
+
+def measure(fan_out, event_id, message):
+    from models import db
+    started = time.perf_counter()
+    created = fan_out(event_id, message, timedelta(minutes=5))
+    db.session.commit()
+    return created, time.perf_counter() - started
+
+def broadcast_fan_out(event_id, message, dedup_window):
+    from broadcasts import publish_broadcast
+    _, created = publish_broadcast(event_id, message, dedup_window)
+    return int(created)
+
+def run(user_counts, skip_legacy):
+    print(f"{'users':>8} {'legacy, s':>10} {'bulk, s':>10} {'bulk rerun (dedup), s':>22} {'broadcast, s':>13}")
+    for user_count in user_counts:
+        event_id = seed(user_count)
+        legacy_time = None
+        if not skip_legacy:
+            _, legacy_time = measure(legacy_fan_out, event_id, 'legacy')
+        created, bulk_time = measure(bulk_fan_out, event_id, 'bulk')
+        duplicates, rerun_time = measure(bulk_fan_out, event_id, 'bulk')
+        broadcasts, broadcast_time = measure(broadcast_fan_out, event_id, 'broadcast')
+        assert created == user_count and duplicates == 0 and broadcasts == 1
+        legacy_column = f"{legacy_time:10.3f}" if legacy_time is not None else f"{'-':>10}"
+        print(f"{user_count:>8} {legacy_column} {bulk_time:10.3f} {rerun_time:22.3f} {broadcast_time:13.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Замер времени рассылки уведомлений в зависимости от числа пользователей.')
+    parser.add_argument('--users', type=str, default='1000,5000,30000', help='Список количеств пользователей через запятую.')
+    parser.add_argument('--skip-legacy', action='store_true', help='Не замерять старую построчную рассылку.')
+    args = parser.parse_args()
+
+    database_path = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path}'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import app
+
+    with app.app_context():
+        run([int(count) for count in args.users.split(',')], args.skip_legacy)
+
+    print(f"Временная база: {database_path}")
@@ -0,0 +1,29 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_offload_enabled = False
+
+def configure_blocking_offload(enabled: bool, threads: int):
+    global _offload_enabled
+    _offload_enabled = enabled
+    if enabled:
+        from eventlet import tpool
+        tpool.set_num_threads(threads)
+        logger.info(f"Blocking calls are offloaded to a native thread pool of {threads} threads.")
+
+def is_offload_enabled() -> bool:
+    return _offload_enabled
+
+def _runs_on_hub() -> bool:
+    from eventlet import patcher
+    if patcher.is_monkey_patched('thread'):
+        return True
+    return threading.current_thread() is threading.main_thread()
+
+def run_blocking(function, *args, **kwargs):
+    if not _offload_enabled or not _runs_on_hub():
+        return function(*args, **kwargs)
+    from eventlet import tpool
+    return tpool.execute(function, *args, **kwargs)
@@ -0,0 +1,135 @@
+import logging
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import exists, and_, or_, false, func, delete, update
+from models import db, User, Event, BroadcastNotification, BroadcastRead, NotificationOptOut, as_utc
+
+logger = logging.getLogger(__name__)
+
+def publish_broadcast(event_id: int, message: str, dedup_window: timedelta):
+    now_utc = datetime.now(timezone.utc)
+    existing_broadcast = BroadcastNotification.query.filter(
+        BroadcastNotification.event_id == event_id,
+        BroadcastNotification.message == message,
+        BroadcastNotification.created_at > now_utc - dedup_window
+    ).first()
+    if existing_broadcast:
+        logger.debug(f"Skipping duplicate broadcast for event {event_id}: {existing_broadcast.id}")
+        return existing_broadcast, False
+
+    broadcast = BroadcastNotification(message=message, event_id=event_id, created_at=now_utc)
+    db.session.add(broadcast)
+    db.session.flush()
+    return broadcast, True
+
+def _opted_out_at(user_id: int, moment):
+    return exists().where(
+        NotificationOptOut.user_id == user_id,
+        NotificationOptOut.started_at <= moment,
+        or_(NotificationOptOut.ended_at.is_(None), NotificationOptOut.ended_at > moment)
+    )
+
+def visible_broadcasts_filter(user: User):
+    if user.is_admin:
+        return false()
+    return and_(
+        BroadcastNotification.created_at >= user.created_at,
+        ~_opted_out_at(user.id, BroadcastNotification.created_at)
+    )
+
+def set_notifications_enabled(user: User, enabled: bool):
+    if enabled == user.notifications_enabled:
+        return
+    now_utc = datetime.now(timezone.utc)
+    user.notifications_enabled = enabled
+    if not enabled:
+        db.session.add(NotificationOptOut(user_id=user.id, started_at=now_utc))
+        return
+    db.session.execute(
+        update(NotificationOptOut)
+        .where(NotificationOptOut.user_id == user.id, NotificationOptOut.ended_at.is_(None))
+        .values(ended_at=now_utc)
+        .execution_options(synchronize_session=False)
+    )
+
+def open_missing_opt_outs() -> int:
+    has_open_opt_out = exists().where(NotificationOptOut.user_id == User.id, NotificationOptOut.ended_at.is_(None))
+    opted_out_users = db.session.query(User.id, User.created_at).filter(
+        User.notifications_enabled == False, ~has_open_opt_out
+    ).all()
+    db.session.add_all(NotificationOptOut(user_id=user_id, started_at=created_at) for user_id, created_at in opted_out_users)
+    db.session.commit()
+    logger.info(f"Opened notification opt-out periods for {len(opted_out_users)} users.")
+    return len(opted_out_users)
+
+def broadcast_is_read_expression(user: User):
+    return or_(
+        BroadcastNotification.id <= user.broadcast_read_up_to,
+        exists().where(
+            BroadcastRead.user_id == user.id,
+            BroadcastRead.broadcast_id == BroadcastNotification.id
+        )
+    )
+
+def is_broadcast_visible(user: User, broadcast: BroadcastNotification) -> bool:
+    if user.is_admin or as_utc(broadcast.created_at) < as_utc(user.created_at):
+        return False
+    return not db.session.query(_opted_out_at(user.id, broadcast.created_at)).scalar()
+
+def unread_broadcasts_count(user: User) -> int:
+    if user.is_admin:
+        return 0
+    newer_than_read_mark = and_(
+        visible_broadcasts_filter(user),
+        BroadcastNotification.id > user.broadcast_read_up_to
+    )
+    published = db.session.query(func.count(BroadcastNotification.id)).filter(newer_than_read_mark).scalar()
+    read_individually = db.session.query(func.count(BroadcastRead.broadcast_id)).join(
+        BroadcastNotification, BroadcastRead.broadcast_id == BroadcastNotification.id
+    ).filter(BroadcastRead.user_id == user.id, newer_than_read_mark).scalar()
+    return max(published - read_individually, 0)
+
+def broadcast_feed_query(user: User):
+    is_read = broadcast_is_read_expression(user)
+    return db.session.query(BroadcastNotification, is_read.label('is_read')).filter(
+        visible_broadcasts_filter(user)
+    ).order_by(is_read.asc(), BroadcastNotification.created_at.desc())
+
+def broadcasts_signature(user: User) -> tuple:
+    visible_count, max_visible_id, max_event_updated_at = db.session.query(
+        func.count(BroadcastNotification.id),
+        func.max(BroadcastNotification.id),
+        func.max(Event.updated_at)
+    ).outerjoin(Event, BroadcastNotification.event_id == Event.id).filter(visible_broadcasts_filter(user)).one()
+    read_markers = user.broadcast_reads.count()
+    opt_outs = db.session.query(func.count(NotificationOptOut.id)).filter(NotificationOptOut.user_id == user.id).scalar()
+    return (
+        visible_count, max_visible_id, max_event_updated_at, user.broadcast_read_up_to, read_markers,
+        user.notifications_enabled, opt_outs
+    )
+
+def mark_broadcast_read(user: User, broadcast_id: int) -> bool:
+    if broadcast_id <= user.broadcast_read_up_to:
+        return False
+    if db.session.get(BroadcastRead, (user.id, broadcast_id)):
+        return False
+    db.session.add(BroadcastRead(user_id=user.id, broadcast_id=broadcast_id))
+    return True
+
+def mark_all_broadcasts_read(user: User, up_to_id: Optional[int] = None, up_to: Optional[datetime] = None) -> int:
+    acknowledged = db.session.query(func.max(BroadcastNotification.id)).filter(visible_broadcasts_filter(user))
+    if up_to_id is not None:
+        acknowledged = acknowledged.filter(BroadcastNotification.id <= up_to_id)
+    if up_to is not None:
+        acknowledged = acknowledged.filter(BroadcastNotification.created_at <= up_to)
+    max_visible_id = acknowledged.scalar()
+    if not max_visible_id or max_visible_id <= user.broadcast_read_up_to:
+        return user.broadcast_read_up_to
+    user.broadcast_read_up_to = max_visible_id
+    db.session.execute(
+        delete(BroadcastRead).where(
+            BroadcastRead.user_id == user.id,
+            BroadcastRead.broadcast_id <= max_visible_id
+        )
+    )
+    return max_visible_id
@@ -0,0 +1,115 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+def node(report_seconds):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import scheduler_election, start_background_services
+    start_background_services()
+    while True:
+        print(int(scheduler_election.is_leader), flush=True)
+        time.sleep(report_seconds)
+
+class NodeProcess:
+    def __init__(self, index, env):
+        self.index = index
+        self.is_leader = False
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--node'],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            self.is_leader = line.strip() == '1'
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+def leaders(nodes) -> list:
+    return [node.index for node in nodes if node.alive and node.is_leader]
+
+def wait_for_single_leader(nodes, timeout) -> float:
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        if len(leaders(nodes)) == 1:
+            return time.monotonic() - started
+        time.sleep(0.1)
+    return None
+
+def observe(nodes, seconds) -> list:
+    violations = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        current = leaders(nodes)
+        if len(current) != 1:
+            violations.append(current)
+        time.sleep(0.1)
+    return violations
+
+def run(node_count, ttl_seconds, heartbeat_seconds, observe_seconds) -> bool:
+    database_path = os.path.join(tempfile.mkdtemp(), 'leader-election.db')
+    env = dict(
+        os.environ,
+        DATABASE_URL=f'sqlite:///{database_path}',
+        SCHEDULER_LEASE_TTL_SECONDS=str(ttl_seconds),
+        SCHEDULER_HEARTBEAT_SECONDS=str(heartbeat_seconds),
+        JOB_WORKERS='0'
+    )
+    os.environ.update(env)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import app
+    from models import db
+    with app.app_context():
+        db.create_all()
+
+    takeover_timeout = ttl_seconds + heartbeat_seconds * 2 + 5
+    nodes = [NodeProcess(index, env) for index in range(node_count)]
+    try:
+        elected_in = wait_for_single_leader(nodes, takeover_timeout)
+        if elected_in is None:
+            print(f"Лидер не выбран за {takeover_timeout}с, лидеры: {leaders(nodes)}")
+            return False
+        violations = observe(nodes, observe_seconds)
+        print(f"Процессов: {node_count}, лидер №{leaders(nodes)[0]} выбран за {elected_in:.1f}с, "
+              f"нарушений за {observe_seconds}с: {len(violations)}")
+        if violations:
+            return False
+
+        leader = nodes[leaders(nodes)[0]]
+        leader.process.kill()
+        leader.process.wait(10)
+        took_over_in = wait_for_single_leader(nodes, takeover_timeout)
+        if took_over_in is None:
+            print(f"После остановки лидера №{leader.index} новый не выбран за {takeover_timeout}с")
+            return False
+        violations = observe(nodes, observe_seconds)
+        print(f"Лидер №{leader.index} остановлен, лидером стал №{leaders(nodes)[0]} через {took_over_in:.1f}с, "
+              f"нарушений за {observe_seconds}с: {len(violations)}")
+        return not violations
+    finally:
+        for node_process in nodes:
+            if node_process.alive:
+                node_process.process.terminate()
+                node_process.process.wait(10)
+        print(f"Временная база: {database_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Проверка выбора лидера планировщика: несколько процессов, ровно один лидер.')
+    parser.add_argument('--processes', type=int, default=3, help='Количество процессов сервера.')
+    parser.add_argument('--ttl', type=int, default=3, help='Срок аренды, с.')
+    parser.add_argument('--heartbeat', type=float, default=0.5, help='Период продления аренды, с.')
+    parser.add_argument('--observe', type=float, default=5, help='Сколько секунд наблюдать за лидером после выбора.')
+    parser.add_argument('--node', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.node:
+        node(min(args.heartbeat, 0.2))
+    else:
+        sys.exit(0 if run(args.processes, args.ttl, args.heartbeat, args.observe) else 1)
@@ -6,6 +6,7 @@ load_dotenv()
 class Config:
     CORS_ORIGINS = ["http://localhost:3000"]
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
+    EXPOSE_QUERY_COUNT = os.getenv('EXPOSE_QUERY_COUNT', 'False').lower() == 'true'
 
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -15,4 +16,56 @@ class Config:
     
     UPLOAD_FOLDER = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+    MAX_PAGE_LIMIT = int(os.getenv('MAX_PAGE_LIMIT', '100'))
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '200'))
+
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+    SEARCH_TS_CONFIG = os.getenv('SEARCH_TS_CONFIG', 'russian')
+
+    EVENTS_CACHE_MAX_ENTRIES = int(os.getenv('EVENTS_CACHE_MAX_ENTRIES', '256'))
+    EVENTS_CACHE_TTL_SECONDS = float(os.getenv('EVENTS_CACHE_TTL_SECONDS', '30'))
+
+    EVENT_STATUS_SWEEP_SECONDS = int(os.getenv('EVENT_STATUS_SWEEP_SECONDS', '60'))
+    EVENT_STATUS_BATCH_SIZE = int(os.getenv('EVENT_STATUS_BATCH_SIZE', '500'))
+
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+    JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '5'))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+    JOB_RETRY_BACKOFF_SECONDS = float(os.getenv('JOB_RETRY_BACKOFF_SECONDS', '10'))
+    JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv('JOB_LOCK_TIMEOUT_SECONDS', '600'))
+    NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', '90'))
+    NOTIFICATION_MAX_PER_USER = int(os.getenv('NOTIFICATION_MAX_PER_USER', '500'))
+    NOTIFICATION_RETENTION_BATCH_SIZE = int(os.getenv('NOTIFICATION_RETENTION_BATCH_SIZE', '500'))
+    NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS = float(os.getenv('NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS', '0.1'))
+    NOTIFICATION_RETENTION_INTERVAL_MINUTES = int(os.getenv('NOTIFICATION_RETENTION_INTERVAL_MINUTES', '60'))
+
+    SCHEDULER_LEASE_NAME = os.getenv('SCHEDULER_LEASE_NAME', 'scheduler')
+    SCHEDULER_LEASE_TTL_SECONDS = int(os.getenv('SCHEDULER_LEASE_TTL_SECONDS', '30'))
+    SCHEDULER_HEARTBEAT_SECONDS = float(os.getenv('SCHEDULER_HEARTBEAT_SECONDS', '10'))
+
+    REMINDER_CHUNK_SIZE = int(os.getenv('REMINDER_CHUNK_SIZE', '200'))
+    REMINDER_METRICS_HISTORY = int(os.getenv('REMINDER_METRICS_HISTORY', '50'))
+    REMINDER_MAX_RETRIES = int(os.getenv('REMINDER_MAX_RETRIES', '5'))
+    REMINDER_RETRY_BACKOFF_SECONDS = float(os.getenv('REMINDER_RETRY_BACKOFF_SECONDS', '30'))
+
+    BLOCKING_OFFLOAD = os.getenv('BLOCKING_OFFLOAD', 'auto').lower()
+    BLOCKING_POOL_THREADS = int(os.getenv('BLOCKING_POOL_THREADS', '4'))
+
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.getenv('IDENTITY_CACHE_MAX_ENTRIES', '10000'))
+    IDENTITY_CACHE_TTL_SECONDS = float(os.getenv('IDENTITY_CACHE_TTL_SECONDS', '30'))
+
+    USER_IMPORT_CHUNK_SIZE = int(os.getenv('USER_IMPORT_CHUNK_SIZE', '1000'))
+    USER_IMPORT_WORKERS = int(os.getenv('USER_IMPORT_WORKERS', '0'))
+
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+
+    LOGIN_RATE_LIMIT_ENABLED = os.getenv('LOGIN_RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    LOGIN_RATE_LIMIT_BACKEND = os.getenv('LOGIN_RATE_LIMIT_BACKEND', 'memory').lower()
+    LOGIN_RATE_LIMIT_MAX_KEYS = int(os.getenv('LOGIN_RATE_LIMIT_MAX_KEYS', '100000'))
+    LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', '20'))
+    LOGIN_IP_PER_MINUTE = float(os.getenv('LOGIN_IP_PER_MINUTE', '10'))
+    LOGIN_EMAIL_BURST = int(os.getenv('LOGIN_EMAIL_BURST', '5'))
+    LOGIN_EMAIL_PER_MINUTE = float(os.getenv('LOGIN_EMAIL_PER_MINUTE', '2'))
+    LOGIN_RATE_LIMIT_PRUNE_MINUTES = int(os.getenv('LOGIN_RATE_LIMIT_PRUNE_MINUTES', '10'))
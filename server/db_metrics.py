@@ -0,0 +1,30 @@
+import logging
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = 'X-Query-Count'
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+def get_query_count():
+    if not has_request_context():
+        return 0
+    return g.get('query_count', 0)
+
+def init_query_counter(app):
+    if not event.contains(Engine, 'before_cursor_execute', _count_query):
+        event.listen(Engine, 'before_cursor_execute', _count_query)
+
+    @app.after_request
+    def add_query_count_header(response):
+        query_count = get_query_count()
+        logger.debug(f"{request.method} {request.path} executed {query_count} SQL statements")
+        if Config.EXPOSE_QUERY_COUNT:
+            response.headers[QUERY_COUNT_HEADER] = str(query_count)
+        return response
@@ -0,0 +1,66 @@
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import and_, or_, update
+from models import db, Event, EventStatus
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def _transition_in_batches(condition, new_status: EventStatus, now_utc: datetime, batch_size: int) -> int:
+    transitioned = 0
+    while True:
+        event_ids = [event_id for (event_id,) in db.session.query(Event.id).filter(condition).limit(batch_size).all()]
+        if not event_ids:
+            return transitioned
+        db.session.execute(
+            update(Event)
+            .where(Event.id.in_(event_ids))
+            .values(status=new_status, updated_at=now_utc)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        transitioned += len(event_ids)
+
+def advance_event_statuses(now_utc: datetime = None, batch_size: int = None) -> dict:
+    now_utc = now_utc or datetime.now(timezone.utc)
+    batch_size = batch_size or Config.EVENT_STATUS_BATCH_SIZE
+
+    finished = _transition_in_batches(
+        and_(
+            Event.status.in_([EventStatus.UPCOMING, EventStatus.ONGOING]),
+            Event.start_datetime <= now_utc,
+            or_(
+                and_(Event.end_datetime.is_(None), Event.start_datetime < now_utc),
+                Event.end_datetime < now_utc
+            )
+        ),
+        EventStatus.FINISHED, now_utc, batch_size
+    )
+    ongoing = _transition_in_batches(
+        and_(
+            Event.status == EventStatus.UPCOMING,
+            Event.start_datetime <= now_utc,
+            Event.end_datetime >= now_utc
+        ),
+        EventStatus.ONGOING, now_utc, batch_size
+    )
+    if finished or ongoing:
+        logger.info(f"Event statuses advanced: {ongoing} ongoing, {finished} finished.")
+    return {'ongoing': ongoing, 'finished': finished}
+
+def recompute_all_event_statuses(batch_size: int = None) -> int:
+    now_utc = datetime.now(timezone.utc)
+    batch_size = batch_size or Config.EVENT_STATUS_BATCH_SIZE
+    changed = 0
+    last_id = 0
+    while True:
+        events = Event.query.filter(Event.id > last_id).order_by(Event.id.asc()).limit(batch_size).all()
+        if not events:
+            return changed
+        for event in events:
+            new_status = event.compute_status(now_utc)
+            if event.status != new_status:
+                event.status = new_status
+                changed += 1
+        db.session.commit()
+        last_id = events[-1].id
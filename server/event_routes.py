@@ -1,29 +1,31 @@
 from typing import Optional
 from flask import request, jsonify
-from models import db, Event, User, EventLocation, EventType, Role, ParticipantRoleEnum, Notification, Participation 
+from models import db, Event, EventLocation, EventType, Role, ParticipantRoleEnum, Participation, ACTIVE_EVENT_STATUSES, ARCHIVE_EVENT_STATUSES, as_utc
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_, and_ 
+from sqlalchemy.orm import joinedload, subqueryload, selectinload, load_only, lazyload
+from sqlalchemy import func
 from datetime import datetime, timedelta, timezone
 import logging
-import os
-import uuid
 from werkzeug.utils import secure_filename
 from config import Config
+from pagination import PaginationError, parse_limit, order_by_keyset, paginate_keyset
+from search_index import apply_search, index_event, remove_event_from_index
+from listing_cache import events_listing_cache
+from http_cache import make_etag, conditional_json
+from streaming import wants_stream, stream_json_array
+from broadcasts import publish_broadcast
+from notification_counters import discount_unread_for_event
+from reminder_scheduler import schedule_event_reminder, cancel_event_reminder
+from identity import is_admin_request
+from job_queue import enqueue_job, notify_workers, register_job_handler
+from images import queue_image_variants, is_valid_image
+from blocking_calls import run_blocking
+from upload_storage import save_upload, discard_upload, release_upload
 
 logger = logging.getLogger(__name__)
 
-def _delete_image_file(image_url: Optional[str]):
-    if not image_url: return
-    try:
-        filename = os.path.basename(image_url)
-        filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            logger.info(f"Deleted image file: {filepath}")
-        else:
-            logger.warning(f"Attempted to delete non-existent file: {filepath}")
-    except Exception as e:
-        logger.error(f"Error deleting image file for url {image_url}: {e}", exc_info=True)
+EVENT_VIEWS = ('full', 'card')
+NEW_EVENT_FANOUT_JOB = 'new_event_fanout'
 
 def parse_datetime(date_string: Optional[str]) -> Optional[datetime]:
     if not date_string: return None
@@ -33,116 +35,255 @@ def parse_datetime(date_string: Optional[str]) -> Optional[datetime]:
         logger.warning(f"Could not parse datetime string: '{date_string}'. Error: {e}")
         return None
 
-def get_user_or_404(user_id):
-    user = User.query.get(user_id)
-    if not user:
-        logger.warning(f"User with ID {user_id} not found.")
-    return user
+def get_participating_event_ids(user_id) -> set:
+    rows = db.session.query(Participation.event_id).filter(Participation.user_id == user_id).all()
+    return {event_id for (event_id,) in rows}
+
+def parse_event_filters(args) -> dict:
+    filters = {'status': args.get('status', 'active')}
+
+    start_date_utc = parse_datetime(args.get('startDate'))
+    if start_date_utc:
+        filters['start_date'] = start_date_utc
+    end_date_utc = parse_datetime(args.get('endDate'))
+    if end_date_utc:
+        filters['end_date'] = datetime(end_date_utc.year, end_date_utc.month, end_date_utc.day, 23, 59, 59, 999999, tzinfo=timezone.utc)
+
+    role_str = args.get('role')
+    if role_str:
+        try:
+            filters['role'] = ParticipantRoleEnum(role_str)
+        except ValueError: 
+            logger.warning(f"Invalid role filter value: {role_str}")
+    location_str = args.get('location')
+    if location_str:
+        try:
+            filters['location'] = EventLocation(location_str)
+        except ValueError: 
+            logger.warning(f"Invalid location filter value: {location_str}")
+    type_str = args.get('type')
+    if type_str:
+        try:
+            filters['type'] = EventType(type_str)
+        except ValueError: 
+            logger.warning(f"Invalid type filter value: {type_str}")
+
+    search_term = (args.get('search') or '').strip()
+    if search_term:
+        filters['search'] = search_term
+    return filters
+
+def event_filters_cache_key(filters: dict, *extra) -> tuple:
+    normalized = []
+    for name, value in sorted(filters.items()):
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, (ParticipantRoleEnum, EventLocation, EventType)):
+            value = value.name
+        elif name == 'search':
+            value = value.lower()
+        normalized.append((name, value))
+    return tuple(normalized) + extra
+
+def build_events_query(filters: dict):
+    query = Event.query
+    status_param = filters.get('status')
+
+    if status_param == 'active':
+        query = query.filter(Event.status.in_(ACTIVE_EVENT_STATUSES))
+    elif status_param == 'archive':
+        query = query.filter(Event.status.in_(ARCHIVE_EVENT_STATUSES))
+
+    search_rank = None
+    if 'search' in filters:
+        query, search_rank = apply_search(query, filters['search'])
+    if 'start_date' in filters:
+        query = query.filter(Event.start_datetime >= filters['start_date'])
+    if 'end_date' in filters:
+        query = query.filter(Event.start_datetime <= filters['end_date'])
+    if 'role' in filters:
+        query = query.join(Event.roles).filter(Role.name == filters['role'])
+    if 'location' in filters:
+        query = query.filter(Event.location == filters['location'])
+    if 'type' in filters:
+        query = query.filter(Event.event_type == filters['type'])
+
+    return query, search_rank
+
+def count_event_facets(filters: dict) -> dict:
+    facets = {}
+
+    location_filters = {name: value for name, value in filters.items() if name != 'location'}
+    location_query = build_events_query(location_filters)[0]
+    location_counts = dict(location_query.with_entities(Event.location, func.count(Event.id)).group_by(Event.location).all())
+    facets['location'] = {location.value: location_counts.get(location, 0) for location in EventLocation}
+
+    type_filters = {name: value for name, value in filters.items() if name != 'type'}
+    type_query = build_events_query(type_filters)[0]
+    type_counts = dict(type_query.with_entities(Event.event_type, func.count(Event.id)).group_by(Event.event_type).all())
+    facets['type'] = {event_type.value: type_counts.get(event_type, 0) for event_type in EventType}
+
+    role_filters = {name: value for name, value in filters.items() if name != 'role'}
+    role_query = build_events_query(role_filters)[0].join(Event.roles)
+    role_counts = dict(role_query.with_entities(Role.name, func.count(Event.id)).group_by(Role.name).all())
+    facets['role'] = {role.value: role_counts.get(role, 0) for role in ParticipantRoleEnum}
+
+    facets['total'] = build_events_query(filters)[0].with_entities(func.count(Event.id)).scalar()
+    return facets
+
+def parse_event_view(view_str: Optional[str]) -> str:
+    if not view_str:
+        return 'full'
+    if view_str not in EVENT_VIEWS:
+        logger.warning(f"Invalid events view value: {view_str}")
+        return 'full'
+    return view_str
+
+def events_query_options(view: str, streaming: bool = False) -> tuple:
+    if view == 'card':
+        return (
+            load_only(Event.id, Event.title, Event.start_datetime, Event.end_datetime, Event.location,
+                      Event.event_type, Event.image_url, Event.image_variants, Event.status, Event.updated_at),
+            lazyload(Event.roles),
+        )
+    roles_loader = selectinload(Event.roles) if streaming else subqueryload(Event.roles)
+    return (joinedload(Event.author), roles_loader)
+
+def serialize_event(event, view: str) -> dict:
+    return event.to_card_dict() if view == 'card' else event.to_dict()
+
+def stream_events_listing(filters: dict, view: str, user_id):
+    query, search_rank = build_events_query(filters)
+    query = query.options(*events_query_options(view, streaming=True))
+    if search_rank is not None:
+        query = order_by_keyset(query, search_rank, Event.id, False)
+    else:
+        query = order_by_keyset(query, Event.start_datetime, Event.id, filters.get('status') == 'archive')
+    participating_ids = get_participating_event_ids(user_id)
+    return stream_json_array(
+        query, lambda event: dict(serialize_event(event, view), is_participating=event.id in participating_ids)
+    )
+
+def load_events_listing(filters: dict, limit: Optional[int], cursor: Optional[str], view: str = 'full'):
+    query, search_rank = build_events_query(filters)
+    query = query.options(*events_query_options(view))
+    descending = filters.get('status') == 'archive'
+
+    if search_rank is not None:
+        if limit is None:
+            events = order_by_keyset(query, search_rank, Event.id, False).all()
+            next_cursor = None
+        else:
+            rows, next_cursor = paginate_keyset(
+                query.add_columns(search_rank), search_rank, Event.id, False, limit, cursor,
+                row_key=lambda row: (row[1], row[0].id), sort_type=float
+            )
+            events = [event for event, _ in rows]
+    elif limit is None:
+        events = order_by_keyset(query, Event.start_datetime, Event.id, descending).all()
+        next_cursor = None
+    else:
+        events, next_cursor = paginate_keyset(
+            query, Event.start_datetime, Event.id, descending, limit, cursor,
+            row_key=lambda event: (event.start_datetime, event.id)
+        )
+    return [serialize_event(event, view) for event in events], next_cursor, events_signature(events, view)
+
+def events_signature(events, view: str = 'full') -> str:
+    if view == 'card':
+        return make_etag('card', *(f"{event.id}:{event.updated_at.isoformat()}" for event in events))
+    return make_etag(*(
+        f"{event.id}:{event.updated_at.isoformat()}:{event.author.username if event.author else ''}" for event in events
+    ))
 
-def check_admin_role(user_id):
-    user = get_user_or_404(user_id)
-    if not user or not user.is_admin:
-        return False
-    return True
+def overlay_participation(events_data: list, participating_ids: set) -> list:
+    return [dict(event_dict, is_participating=event_dict['id'] in participating_ids) for event_dict in events_data]
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
 def register_event_routes(app, socketio):
+
+    def fan_out_new_event(payload: dict) -> dict:
+        event = db.session.get(Event, payload['event_id'])
+        if not event:
+            logger.warning(f"Skipping notification fan-out for deleted event {payload['event_id']}")
+            return {'notified': 0}
+
+        notification_message = f"Добавлено новое мероприятие: «{event.title}»"
+        broadcast, created = publish_broadcast(event.id, notification_message, timedelta(minutes=5))
+        db.session.commit()
+        logger.info(f"Broadcast notification {broadcast.id} {'created' if created else 'already exists'} for new event {event.id}")
+
+        socketio.emit('new_event_added', {
+            'eventId': event.id,
+            'eventTitle': event.title,
+        })
+        logger.info(f"Socket.IO 'new_event_added' emitted for event {event.id}")
+        return {'broadcast_id': broadcast.id}
+
+    register_job_handler(NEW_EVENT_FANOUT_JOB, fan_out_new_event)
     
     @app.route('/api/events', methods=['GET'])
     @jwt_required()
     def get_events():
         try:
             current_user_id = get_jwt_identity() 
-            query = Event.query
-            now_utc = datetime.now(timezone.utc)
+            filters = parse_event_filters(request.args)
+            limit = parse_limit(request.args.get('limit'))
+            cursor = request.args.get('cursor') if limit is not None else None
+            view = parse_event_view(request.args.get('view'))
+            if limit is None and wants_stream(request.args):
+                return stream_events_listing(filters, view, current_user_id)
 
-            status_param = request.args.get('status', 'active') 
-            
-            if status_param == 'active':
-                query = query.filter(
-                    Event.is_archived == False,
-                    or_(
-                        and_(Event.end_datetime.is_(None), Event.start_datetime >= now_utc),
-                        Event.end_datetime >= now_utc,
-                        and_(Event.start_datetime <= now_utc, Event.end_datetime >= now_utc) 
-                    )
-                )
-            elif status_param == 'archive':
-                query = query.filter(
-                    or_(
-                        Event.is_archived == True,
-                        and_(
-                            Event.is_archived == False,
-                            or_(
-                                and_(Event.end_datetime.is_(None), Event.start_datetime < now_utc),
-                                Event.end_datetime < now_utc
-                            )
-                        )
-                    )
-                )
-
-            start_date_str = request.args.get('startDate')
-            end_date_str = request.args.get('endDate')
-            role_str = request.args.get('role')
-            location_str = request.args.get('location')
-            type_str = request.args.get('type')
-            search_term = request.args.get('search')
-
-            if search_term:
-                search_pattern = f"%{search_term}%"
-                query = query.filter(or_(Event.title.ilike(search_pattern), Event.description.ilike(search_pattern)))
-            
-            if start_date_str:
-                start_date_utc = parse_datetime(start_date_str)
-                if start_date_utc:
-                    query = query.filter(Event.start_datetime >= start_date_utc)
-            if end_date_str:
-                end_date_utc = parse_datetime(end_date_str)
-                if end_date_utc:
-                   end_date_utc_eod = datetime(end_date_utc.year, end_date_utc.month, end_date_utc.day, 23, 59, 59, 999999, tzinfo=timezone.utc)
-                   query = query.filter(Event.start_datetime <= end_date_utc_eod)
-                   
-            if role_str:
-                try:
-                    role_enum = ParticipantRoleEnum(role_str)
-                    query = query.join(Event.roles).filter(Role.name == role_enum)
-                except ValueError: 
-                    logger.warning(f"Invalid role filter value: {role_str}")
-            if location_str:
-                try:
-                    location_enum = EventLocation(location_str)
-                    query = query.filter(Event.location == location_enum)
-                except ValueError: 
-                    logger.warning(f"Invalid location filter value: {location_str}")
-            if type_str:
-                try:
-                    type_enum = EventType(type_str)
-                    query = query.filter(Event.event_type == type_enum)
-                except ValueError: 
-                    logger.warning(f"Invalid type filter value: {type_str}")
-
-            if status_param == 'archive':
-                query = query.order_by(Event.start_datetime.desc())
-            else:
-                query = query.order_by(Event.start_datetime.asc())
-
-            events = query.all()
-            
-            events_data = []
-            for event in events:
-                event_dict = event.to_dict()
-                participation = Participation.query.filter_by(user_id=current_user_id, event_id=event.id).first()
-                event_dict['is_participating'] = True if participation else False
-                events_data.append(event_dict)
-
-            return jsonify(events_data), 200
-            
+            cache_key = event_filters_cache_key(filters, limit, cursor, view)
+            cached = events_listing_cache.get(cache_key)
+            if cached is None:
+                cached = load_events_listing(filters, limit, cursor, view)
+                events_listing_cache.set(cache_key, cached)
+            items, next_cursor, listing_signature = cached
+
+            participating_ids = get_participating_event_ids(current_user_id)
+            visible_ids = {event_dict['id'] for event_dict in items}
+            etag = make_etag(listing_signature, next_cursor, sorted(participating_ids & visible_ids))
+
+            def build_payload():
+                events_data = overlay_participation(items, participating_ids)
+                if limit is None:
+                    return events_data
+                return {"items": events_data, "next_cursor": next_cursor}
+
+            return conditional_json(etag, build_payload)
+
+        except PaginationError as e:
+            logger.warning(f"Invalid pagination parameters for events: {e}")
+            return jsonify({"error": "Некорректные параметры пагинации"}), 400
         except Exception as e:
             logger.error(f"Error fetching events: {e}", exc_info=True)
             return jsonify({"error": "Не удалось загрузить мероприятия"}), 500
 
+    @app.route('/api/events/facets', methods=['GET'])
+    @jwt_required()
+    def get_event_facets():
+        try:
+            filters = parse_event_filters(request.args)
+            cache_key = ('facets',) + event_filters_cache_key(filters)
+            facets = events_listing_cache.get(cache_key)
+            if facets is None:
+                facets = count_event_facets(filters)
+                events_listing_cache.set(cache_key, facets)
+            return jsonify(facets), 200
+        except Exception as e:
+            logger.error(f"Error counting event facets: {e}", exc_info=True)
+            return jsonify({"error": "Не удалось подсчитать количество мероприятий"}), 500
+
+    @app.route('/api/events/cache-stats', methods=['GET'])
+    @jwt_required()
+    def get_events_cache_stats():
+        if not is_admin_request():
+            return jsonify({"error": "Требуются права администратора"}), 403
+        return jsonify(events_listing_cache.stats()), 200
+
     @app.route('/api/events/<int:event_id>', methods=['GET'])
     @jwt_required()
     def get_event(event_id):
@@ -150,10 +291,10 @@ def register_event_routes(app, socketio):
             current_user_id = get_jwt_identity() 
             event = Event.query.get(event_id)
             if event: 
-                event_dict = event.to_dict()
                 participation = Participation.query.filter_by(user_id=current_user_id, event_id=event_id).first()
-                event_dict['is_participating'] = True if participation else False
-                return jsonify(event_dict), 200
+                is_participating = True if participation else False
+                etag = make_etag(events_signature([event]), is_participating)
+                return conditional_json(etag, lambda: dict(event.to_dict(), is_participating=is_participating))
             else: 
                 return jsonify({"error": "Мероприятие не найдено"}), 404
         except Exception as e:
@@ -164,8 +305,7 @@ def register_event_routes(app, socketio):
     @jwt_required()
     def create_event():
         current_user_id = get_jwt_identity()
-        user = get_user_or_404(current_user_id)
-        if not user or not user.is_admin: return jsonify({"error": "Требуются права администратора"}), 403
+        if not is_admin_request(): return jsonify({"error": "Требуются права администратора"}), 403
         data = request.get_json()
         if not data: return jsonify({"error": "Нет данных"}), 400
         required_fields = ['title', 'description', 'start_datetime', 'location', 'event_type', 'roles_available']
@@ -202,54 +342,22 @@ def register_event_routes(app, socketio):
                 archived_at=None 
             )
             new_event.roles = role_objects
+            new_event.refresh_status()
             
             db.session.add(new_event)
+            db.session.flush()
+            index_event(new_event)
+            fanout_job = enqueue_job(
+                NEW_EVENT_FANOUT_JOB, {'event_id': new_event.id},
+                idempotency_key=f"{NEW_EVENT_FANOUT_JOB}:{new_event.id}"
+            )
             db.session.commit() 
-            logger.info(f"Event '{new_event.title}' (ID: {new_event.id}) created by user {current_user_id}")
-
-            try:
-                socketio.emit('new_event_added', {
-                    'eventId': new_event.id,
-                    'eventTitle': new_event.title,
-                })
-                logger.info(f"Socket.IO 'new_event_added' emitted for event {new_event.id}")
-
-                users_to_notify_in_db = User.query.filter_by(is_admin=False, notifications_enabled=True).all()
-                logger.info(f"Found {len(users_to_notify_in_db)} non-admin users with notifications enabled for DB saving.")
-
-                if users_to_notify_in_db:
-                    notification_message = f"Добавлено новое мероприятие: «{new_event.title}»"
-                    notifications_to_add = []
-                    for user_to_notify in users_to_notify_in_db:
-                        existing_notification = Notification.query.filter(
-                            Notification.user_id == user_to_notify.id,
-                            Notification.event_id == new_event.id,
-                            Notification.message == notification_message,
-                            Notification.created_at > (datetime.now(timezone.utc) - timedelta(minutes=5)) 
-                        ).first()
-
-                        if not existing_notification:
-                            notification = Notification(
-                                user_id=user_to_notify.id,
-                                message=notification_message,
-                                event_id=new_event.id
-                            )
-                            notifications_to_add.append(notification)
-                        else:
-                            logger.debug(f"Skipping duplicate DB notification for user {user_to_notify.id} for new event {new_event.id}.")
-                    
-                    if notifications_to_add:
-                        db.session.add_all(notifications_to_add)
-                        db.session.commit() 
-                        logger.info(f"Created {len(notifications_to_add)} DB notifications for new event {new_event.id}")
-                else:
-                    logger.info("No non-admin users with notifications enabled to create DB notifications for.")
-
-            except Exception as e:
-                logger.error(f"Failed to process notifications for new event {new_event.id}: {e}", exc_info=True)
-                db.session.rollback() 
+            events_listing_cache.invalidate()
+            notify_workers()
+            schedule_event_reminder(new_event)
+            logger.info(f"Event '{new_event.title}' (ID: {new_event.id}) created by user {current_user_id}, notification job {fanout_job.id} enqueued")
 
-            return jsonify(new_event.to_dict()), 201
+            return jsonify(dict(new_event.to_dict(), notification_job_id=fanout_job.id)), 201
             
         except (ValueError, TypeError) as e:
             db.session.rollback() 
@@ -263,8 +371,7 @@ def register_event_routes(app, socketio):
     @jwt_required()
     def update_event(event_id):
         current_user_id = get_jwt_identity()
-        user = get_user_or_404(current_user_id)
-        if not user or not user.is_admin: return jsonify({"error": "Требуются права администратора"}), 403
+        if not is_admin_request(): return jsonify({"error": "Требуются права администратора"}), 403
         event = Event.query.get(event_id)
         if not event: return jsonify({"error": "Мероприятие не найдено"}), 404
         data = request.get_json()
@@ -281,7 +388,7 @@ def register_event_routes(app, socketio):
                  end_dt_utc = parse_datetime(data['end_datetime'])
                  if data['end_datetime'] and not end_dt_utc: return jsonify({"error": "Неверный формат даты окончания"}), 400
                  event.end_datetime = end_dt_utc
-            if event.end_datetime and event.start_datetime and event.end_datetime < event.start_datetime: return jsonify({"error": "Дата окончания не может быть раньше даты начала"}), 400
+            if event.end_datetime and event.start_datetime and as_utc(event.end_datetime) < as_utc(event.start_datetime): return jsonify({"error": "Дата окончания не может быть раньше даты начала"}), 400
             if 'location' in data: event.location = EventLocation(data['location'])
             if 'location_details' in data: event.location_details = data.get('location_details')
             if 'event_type' in data: event.event_type = EventType(data['event_type'])
@@ -296,6 +403,7 @@ def register_event_routes(app, socketio):
                         return jsonify({"error": "Необходимо указать хотя бы одну роль"}), 400
                     
                     event.roles = role_objects
+                    event.updated_at = datetime.now(timezone.utc)
                 else: 
                     return jsonify({"error": "'roles_available' должно быть списком строк ролей"}), 400
             
@@ -310,7 +418,11 @@ def register_event_routes(app, socketio):
                 elif not event.is_archived:
                     event.archived_at = None
 
+            event.refresh_status()
+            index_event(event)
             db.session.commit()
+            events_listing_cache.invalidate()
+            schedule_event_reminder(event)
             logger.info(f"Event ID {event_id} updated by user {current_user_id}")
             
             return jsonify(event.to_dict()), 200
@@ -327,15 +439,18 @@ def register_event_routes(app, socketio):
     @jwt_required()
     def delete_event(event_id):
         current_user_id = get_jwt_identity()
-        user = get_user_or_404(current_user_id)
-        if not user or not user.is_admin: return jsonify({"error": "Требуются права администратора"}), 403
+        if not is_admin_request(): return jsonify({"error": "Требуются права администратора"}), 403
         event = Event.query.get(event_id)
         if not event: return jsonify({"error": "Мероприятие не найдено"}), 404
         try:
             image_to_delete = event.image_url
+            remove_event_from_index(event.id)
+            discount_unread_for_event(event.id)
             db.session.delete(event)
             db.session.commit()
-            _delete_image_file(image_to_delete)
+            events_listing_cache.invalidate()
+            cancel_event_reminder(event_id)
+            release_upload(image_to_delete)
             logger.info(f"Event ID {event_id} HARD DELETED by user {current_user_id}")
             return jsonify({"message": "Мероприятие успешно удалено навсегда"}), 200
         except Exception as e:
@@ -347,8 +462,7 @@ def register_event_routes(app, socketio):
     @jwt_required()
     def archive_event(event_id):
         current_user_id = get_jwt_identity()
-        user = get_user_or_404(current_user_id)
-        if not user or not user.is_admin: return jsonify({"error": "Требуются права администратора"}), 403
+        if not is_admin_request(): return jsonify({"error": "Требуются права администратора"}), 403
         
         event = Event.query.get(event_id)
         if not event: return jsonify({"error": "Мероприятие не найдено"}), 404
@@ -359,7 +473,10 @@ def register_event_routes(app, socketio):
         try:
             event.is_archived = True
             event.archived_at = datetime.now(timezone.utc)
+            event.refresh_status()
             db.session.commit()
+            events_listing_cache.invalidate()
+            cancel_event_reminder(event_id)
             logger.info(f"Event ID {event_id} archived by user {current_user_id}")
             return jsonify(event.to_dict()), 200
         except Exception as e:
@@ -371,19 +488,21 @@ def register_event_routes(app, socketio):
     @jwt_required()
     def restore_event(event_id):
         current_user_id = get_jwt_identity()
-        user = get_user_or_404(current_user_id)
-        if not user or not user.is_admin: return jsonify({"error": "Требуются права администратора"}), 403
+        if not is_admin_request(): return jsonify({"error": "Требуются права администратора"}), 403
         
         event = Event.query.get(event_id)
         if not event: return jsonify({"error": "Мероприятие не найдено"}), 404
         
-        if not event.is_archived and (event.end_datetime is None or event.end_datetime >= datetime.now(timezone.utc)):
+        if event.compute_status(datetime.now(timezone.utc)) in ACTIVE_EVENT_STATUSES:
              return jsonify({"message": "Мероприятие уже активно"}), 200
         
         try:
             event.is_archived = False
             event.archived_at = None
+            event.refresh_status()
             db.session.commit()
+            events_listing_cache.invalidate()
+            schedule_event_reminder(event)
             logger.info(f"Event ID {event_id} restored by user {current_user_id}")
             return jsonify(event.to_dict()), 200
         except Exception as e:
@@ -395,7 +514,7 @@ def register_event_routes(app, socketio):
     @jwt_required()
     def upload_event_image(event_id):
         current_user_id = get_jwt_identity()
-        if not check_admin_role(current_user_id):
+        if not is_admin_request():
             return jsonify({"error": "Требуются права администратора"}), 403
         event = Event.query.get(event_id)
         if not event:
@@ -406,22 +525,29 @@ def register_event_routes(app, socketio):
         if file.filename == '':
             return jsonify({"error": "Файл не выбран"}), 400
         if file and allowed_file(file.filename):
+            if not run_blocking(is_valid_image, file.stream):
+                return jsonify({"error": "Файл не является изображением"}), 400
+            image_url = None
             try:
                 old_image_url = event.image_url
-                if not os.path.exists(Config.UPLOAD_FOLDER):
-                    os.makedirs(Config.UPLOAD_FOLDER)
                 filename = secure_filename(file.filename)
                 ext = filename.rsplit('.', 1)[1].lower()
-                unique_filename = f"{uuid.uuid4().hex}.{ext}"
-                filepath = os.path.join(Config.UPLOAD_FOLDER, unique_filename)
-                file.save(filepath)
-                event.image_url = f"/uploads/{unique_filename}"
+                image_url = save_upload(file, ext)
+                if image_url == old_image_url:
+                    db.session.rollback()
+                    return jsonify(event.to_dict()), 200
+                event.image_url = image_url
+                event.image_variants = None
+                variants_job = queue_image_variants('event', event.id, event.image_url)
                 db.session.commit()
-                _delete_image_file(old_image_url)
-                logger.info(f"Image uploaded for event {event_id} by user {current_user_id}. Path: {event.image_url}")
+                events_listing_cache.invalidate()
+                notify_workers()
+                release_upload(old_image_url)
+                logger.info(f"Image uploaded for event {event_id} by user {current_user_id}. Path: {event.image_url}, variants job {variants_job.id}")
                 return jsonify(event.to_dict()), 200
             except Exception as e:
                 db.session.rollback()
+                discard_upload(image_url)
                 logger.error(f"Error uploading image for event {event_id}: {e}", exc_info=True)
                 return jsonify({"error": "Ошибка при сохранении файла"}), 500
         else:
@@ -431,7 +557,7 @@ def register_event_routes(app, socketio):
     @jwt_required()
     def delete_event_image(event_id):
         current_user_id = get_jwt_identity()
-        if not check_admin_role(current_user_id):
+        if not is_admin_request():
             return jsonify({"error": "Требуются права администратора"}), 403
             
         event = Event.query.get(event_id)
@@ -444,8 +570,10 @@ def register_event_routes(app, socketio):
         try:
             image_to_delete = event.image_url
             event.image_url = None
+            event.image_variants = None
             db.session.commit()
-            _delete_image_file(image_to_delete)
+            events_listing_cache.invalidate()
+            release_upload(image_to_delete)
             logger.info(f"Image deleted for event {event_id} by user {current_user_id}")
             return jsonify(event.to_dict()), 200
         except Exception as e:
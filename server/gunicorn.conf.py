@@ -0,0 +1,3 @@
+def post_worker_init(worker):
+    from app import start_background_services
+    start_background_services()
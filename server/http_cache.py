@@ -0,0 +1,16 @@
+import hashlib
+from flask import request, jsonify, current_app
+
+def make_etag(*parts) -> str:
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:40]
+
+def _set_validators(response, etag: str):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def conditional_json(etag: str, build_payload):
+    if request.if_none_match.contains(etag):
+        return _set_validators(current_app.response_class(status=304), etag)
+    return _set_validators(jsonify(build_payload()), etag)
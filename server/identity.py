@@ -0,0 +1,60 @@
+import logging
+from typing import NamedTuple, Optional
+from flask import jsonify
+from flask_jwt_extended import get_jwt, get_current_user
+from models import db, User
+from listing_cache import ListingCache
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class UserIdentity(NamedTuple):
+    id: int
+    is_admin: bool
+    auth_version: int
+
+identity_cache = ListingCache(Config.IDENTITY_CACHE_MAX_ENTRIES, Config.IDENTITY_CACHE_TTL_SECONDS)
+
+def token_claims(user: User) -> dict:
+    return {'is_admin': user.is_admin, 'ver': user.auth_version}
+
+def load_identity(user_id) -> Optional[UserIdentity]:
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    identity = identity_cache.get(user_id)
+    if identity is None:
+        row = db.session.query(User.id, User.is_admin, User.auth_version).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        identity = UserIdentity(*row)
+        identity_cache.set(user_id, identity)
+    return identity
+
+def invalidate_identity(user_id):
+    identity_cache.discard(int(user_id))
+
+def bump_auth_version(user: User):
+    user.auth_version = (user.auth_version or 0) + 1
+    invalidate_identity(user.id)
+
+def current_identity() -> UserIdentity:
+    return get_current_user()
+
+def is_admin_request() -> bool:
+    return bool(get_jwt().get('is_admin'))
+
+def init_identity(jwt):
+
+    @jwt.user_lookup_loader
+    def lookup_user_identity(jwt_header, jwt_data):
+        identity = load_identity(jwt_data['sub'])
+        if identity is None or jwt_data.get('ver') != identity.auth_version:
+            return None
+        return identity
+
+    @jwt.user_lookup_error_loader
+    def reject_stale_token(jwt_header, jwt_data):
+        logger.warning(f"Rejected token for user {jwt_data.get('sub')}: user missing or token version is stale")
+        return jsonify({"error": "Сессия устарела, войдите снова"}), 401
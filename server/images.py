@@ -0,0 +1,142 @@
+import logging
+import os
+import uuid
+from PIL import Image, ImageOps, UnidentifiedImageError
+from models import db, Event, User
+from config import Config
+from blocking_calls import run_blocking
+from job_queue import enqueue_job, register_job_handler, PermanentJobError
+from listing_cache import events_listing_cache
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANTS_JOB = 'image_variants'
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+VARIANT_PROFILES = {
+    'event': {
+        'thumb': ((160, 120), True),
+        'card': ((640, 400), True),
+        'full': ((1600, 1600), False),
+    },
+    'avatar': {
+        'thumb': ((64, 64), True),
+        'card': ((256, 256), True),
+        'full': ((512, 512), True),
+    },
+}
+IMAGE_OWNERS = {
+    'event': (Event, 'image_url', 'image_variants'),
+    'avatar': (User, 'avatar_url', 'avatar_variants'),
+}
+
+IMAGE_DECODE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, SyntaxError, ValueError, OSError)
+
+class InvalidImageError(PermanentJobError):
+    pass
+
+def is_valid_image(stream) -> bool:
+    try:
+        with Image.open(stream) as image:
+            image.verify()
+        return True
+    except IMAGE_DECODE_ERRORS:
+        return False
+    finally:
+        stream.seek(0)
+
+def upload_path(url: str) -> str:
+    return os.path.join(Config.UPLOAD_FOLDER, os.path.basename(url))
+
+def _flatten_for_jpeg(image: Image.Image) -> Image.Image:
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+def _resize(image: Image.Image, size: tuple, crop: bool) -> Image.Image:
+    if crop:
+        return ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail(size, Image.Resampling.LANCZOS)
+    return resized
+
+def variant_filename(stem: str, kind: str, variant: str, extension: str) -> str:
+    return f"{stem}-{kind}-{variant}.{extension}"
+
+def variant_filenames(stem: str) -> list:
+    return [
+        variant_filename(stem, kind, variant, extension)
+        for kind, profile in VARIANT_PROFILES.items()
+        for variant in profile
+        for extension in VARIANT_FORMATS
+    ]
+
+def variant_urls(stem: str, kind: str) -> dict:
+    return {
+        variant: {extension: f"/uploads/{variant_filename(stem, kind, variant, extension)}" for extension in VARIANT_FORMATS}
+        for variant in VARIANT_PROFILES[kind]
+    }
+
+def render_variants(source_path: str, kind: str) -> dict:
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    variants = variant_urls(stem, kind)
+    if all(os.path.exists(upload_path(url)) for formats in variants.values() for url in formats.values()):
+        return variants
+    try:
+        with Image.open(source_path) as source:
+            image = ImageOps.exif_transpose(source)
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    except IMAGE_DECODE_ERRORS as e:
+        raise InvalidImageError(f"Cannot decode image {os.path.basename(source_path)}: {e}") from e
+    image.info = {}
+    for variant, (size, crop) in VARIANT_PROFILES[kind].items():
+        resized = _resize(image, size, crop)
+        for extension, (image_format, options) in VARIANT_FORMATS.items():
+            output = resized if image_format == 'WEBP' else _flatten_for_jpeg(resized)
+            target = upload_path(variants[variant][extension])
+            partial = f"{target}.{uuid.uuid4().hex}.part"
+            output.save(partial, image_format, **options)
+            os.replace(partial, target)
+    return variants
+
+def delete_upload_files(filenames: list):
+    for filename in filenames:
+        try:
+            os.remove(os.path.join(Config.UPLOAD_FOLDER, filename))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error deleting upload {filename}: {e}", exc_info=True)
+
+def queue_image_variants(kind: str, owner_id: int, source_url: str):
+    return enqueue_job(IMAGE_VARIANTS_JOB, {'kind': kind, 'owner_id': owner_id, 'source_url': source_url})
+
+def generate_image_variants(payload: dict) -> dict:
+    model, url_attribute, variants_attribute = IMAGE_OWNERS[payload['kind']]
+    owner = db.session.get(model, payload['owner_id'])
+    if owner is None or getattr(owner, url_attribute) != payload['source_url']:
+        logger.info(f"Skipping image variants for {payload['kind']} {payload['owner_id']}: image was replaced or removed")
+        return {'skipped': True}
+    db.session.commit()
+
+    variants = run_blocking(render_variants, upload_path(payload['source_url']), payload['kind'])
+
+    owner = db.session.get(model, payload['owner_id'])
+    if owner is None or getattr(owner, url_attribute) != payload['source_url']:
+        if not os.path.exists(upload_path(payload['source_url'])):
+            delete_upload_files([os.path.basename(url) for formats in variants.values() for url in formats.values()])
+        logger.info(f"Discarded image variants for {payload['kind']} {payload['owner_id']}: image changed while rendering")
+        return {'skipped': True}
+    setattr(owner, variants_attribute, variants)
+    db.session.commit()
+    if payload['kind'] == 'event':
+        events_listing_cache.invalidate()
+    logger.info(f"Image variants rendered for {payload['kind']} {payload['owner_id']}: {', '.join(variants)}")
+    return {'variants': variants}
+
+register_job_handler(IMAGE_VARIANTS_JOB, generate_image_variants)
@@ -0,0 +1,141 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import update, or_, and_
+from models import db, Job, JobStatus
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+_wakeup = threading.Event()
+
+class PermanentJobError(Exception):
+    pass
+
+def register_job_handler(kind: str, handler):
+    _handlers[kind] = handler
+
+def enqueue_job(kind: str, payload: dict, idempotency_key: Optional[str] = None, max_attempts: Optional[int] = None) -> Job:
+    if idempotency_key:
+        existing_job = Job.query.filter_by(idempotency_key=idempotency_key).first()
+        if existing_job:
+            logger.info(f"Job with idempotency key '{idempotency_key}' already exists: {existing_job.id}")
+            return existing_job
+
+    job = Job(
+        kind=kind,
+        payload=payload,
+        idempotency_key=idempotency_key,
+        status=JobStatus.PENDING,
+        max_attempts=max_attempts or Config.JOB_MAX_ATTEMPTS,
+        run_after=datetime.now(timezone.utc)
+    )
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+def notify_workers():
+    _wakeup.set()
+
+def _claim_next_job() -> Optional[Job]:
+    now_utc = datetime.now(timezone.utc)
+    claimable = or_(
+        and_(Job.status == JobStatus.PENDING, Job.run_after <= now_utc),
+        and_(Job.status == JobStatus.RUNNING, Job.locked_at < now_utc - timedelta(seconds=Config.JOB_LOCK_TIMEOUT_SECONDS))
+    )
+    candidate_ids = [job_id for (job_id,) in db.session.query(Job.id).filter(claimable).order_by(Job.run_after.asc()).limit(5).all()]
+    for job_id in candidate_ids:
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, claimable)
+            .values(status=JobStatus.RUNNING, locked_at=now_utc, attempts=Job.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return db.session.get(Job, job_id)
+    return None
+
+def _finish_job(job: Job, error: Optional[Exception] = None, result=None):
+    now_utc = datetime.now(timezone.utc)
+    job.locked_at = None
+    if error is None:
+        job.status = JobStatus.SUCCEEDED
+        job.result = result
+        job.last_error = None
+        job.finished_at = now_utc
+    elif job.attempts >= job.max_attempts:
+        job.status = JobStatus.FAILED
+        job.last_error = str(error)[:2000]
+        job.finished_at = now_utc
+    else:
+        job.status = JobStatus.PENDING
+        job.last_error = str(error)[:2000]
+        job.run_after = now_utc + timedelta(seconds=Config.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+    db.session.commit()
+
+def run_next_job() -> bool:
+    job = _claim_next_job()
+    if job is None:
+        return False
+
+    handler = _handlers.get(job.kind)
+    if handler is None:
+        logger.error(f"No handler registered for job kind '{job.kind}' (job {job.id})")
+        job.attempts = job.max_attempts
+        _finish_job(job, error=LookupError(f"Unknown job kind: {job.kind}"))
+        return True
+
+    try:
+        result = handler(dict(job.payload or {}))
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}/{job.max_attempts}: {e}", exc_info=True)
+        job = db.session.get(Job, job.id)
+        if isinstance(e, PermanentJobError):
+            job.attempts = job.max_attempts
+        _finish_job(job, error=e)
+        return True
+
+    _finish_job(job, result=result)
+    logger.info(f"Job {job.id} ({job.kind}) succeeded on attempt {job.attempts}.")
+    return True
+
+
+class JobWorkerPool:
+    def __init__(self, app, size: int, poll_seconds: float):
+        self.app = app
+        self.size = size
+        self.poll_seconds = poll_seconds
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        for index in range(self.size):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Job worker pool started with {self.size} workers.")
+
+    def stop(self, timeout: float = 5):
+        self._stopping.set()
+        _wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self):
+        while not self._stopping.is_set():
+            with self.app.app_context():
+                try:
+                    processed = run_next_job()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Job worker error: {e}", exc_info=True)
+                    processed = False
+            if not processed:
+                _wakeup.wait(self.poll_seconds)
+                _wakeup.clear()
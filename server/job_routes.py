@@ -0,0 +1,29 @@
+import logging
+from flask import jsonify
+from flask_jwt_extended import jwt_required
+from models import db, Job
+from identity import is_admin_request
+from reminder_delivery import reminder_run_history
+
+logger = logging.getLogger(__name__)
+
+def register_job_routes(app):
+
+    @app.route('/api/jobs/<int:job_id>', methods=['GET'])
+    @jwt_required()
+    def get_job_status(job_id):
+        if not is_admin_request():
+            return jsonify({"error": "Требуются права администратора"}), 403
+
+        job = db.session.get(Job, job_id)
+        if not job:
+            return jsonify({"error": "Задача не найдена"}), 404
+        return jsonify(job.to_dict()), 200
+
+
+    @app.route('/api/reminders/runs', methods=['GET'])
+    @jwt_required()
+    def get_reminder_runs():
+        if not is_admin_request():
+            return jsonify({"error": "Требуются права администратора"}), 403
+        return jsonify(reminder_run_history()), 200
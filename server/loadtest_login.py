@@ -0,0 +1,138 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+LOADTEST_PASSWORD = 'loadtest-password'
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+def serve(port, user_count, tick_seconds):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import app, socketio
+    from models import db, User
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        password_hash = User(username='seed', email='seed@example.com')
+        password_hash.set_password(LOADTEST_PASSWORD)
+        db.session.execute(db.insert(User), [
+            {'username': f'load-user-{i}', 'email': f'load-user-{i}@example.com', 'password_hash': password_hash.password_hash}
+            for i in range(user_count)
+        ])
+        db.session.commit()
+
+    def tick():
+        while True:
+            socketio.emit('loadtest_tick', {'sent': time.time()})
+            socketio.sleep(tick_seconds)
+
+    socketio.start_background_task(tick)
+    socketio.run(app, host='127.0.0.1', port=port, use_reloader=False, log_output=False)
+
+def wait_for_server(base_url, timeout=30):
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.post(f'{base_url}/api/login', json={}, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start in {timeout}s")
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def run_scenario(offload, logins, concurrency, tick_seconds):
+    import requests
+    import socketio as socketio_client
+
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}",
+        BLOCKING_OFFLOAD='on' if offload else 'off',
+        LOGIN_RATE_LIMIT_ENABLED='false'
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', str(port), '--logins', str(logins), '--tick-ms', str(int(tick_seconds * 1000))],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_server(base_url)
+        delays = []
+        collecting = threading.Event()
+        client = socketio_client.Client()
+
+        @client.on('loadtest_tick')
+        def on_tick(data):
+            if collecting.is_set():
+                delays.append(time.time() - data['sent'])
+
+        client.connect(base_url, transports=['polling'])
+        time.sleep(1)
+        collecting.set()
+
+        def login(index):
+            started = time.perf_counter()
+            response = requests.post(f'{base_url}/api/login', json={
+                'email': f'load-user-{index}@example.com', 'password': LOADTEST_PASSWORD
+            }, timeout=120)
+            return response.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(login, range(logins)))
+        wall_time = time.perf_counter() - started
+        time.sleep(tick_seconds * 5)
+        collecting.clear()
+        client.disconnect()
+
+        failed = sum(1 for status, _ in results if status != 200)
+        return {
+            'wall_time': wall_time,
+            'login_p95': percentile([duration for _, duration in results], 0.95),
+            'failed': failed,
+            'ticks': len(delays),
+            'tick_p50': percentile(delays, 0.5),
+            'tick_p95': percentile(delays, 0.95),
+            'tick_max': max(delays, default=0.0),
+        }
+    finally:
+        server.terminate()
+        server.wait(10)
+
+def run(logins, concurrency, tick_seconds):
+    print(f"{'bcrypt':>10} {'logins':>7} {'wall, s':>8} {'login p95, s':>13} {'ticks':>6} {'tick p50, ms':>13} {'tick p95, ms':>13} {'tick max, ms':>13}")
+    for offload in (False, True):
+        result = run_scenario(offload, logins, concurrency, tick_seconds)
+        mode = 'tpool' if offload else 'hub'
+        print(
+            f"{mode:>10} {logins - result['failed']:>7} {result['wall_time']:8.2f} {result['login_p95']:13.2f} {result['ticks']:>6} "
+            f"{result['tick_p50'] * 1000:13.0f} {result['tick_p95'] * 1000:13.0f} {result['tick_max'] * 1000:13.0f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Нагрузочный тест: параллельные входы и задержка доставки Socket.IO-сообщений.')
+    parser.add_argument('--logins', type=int, default=40, help='Количество одновременных входов (и тестовых пользователей).')
+    parser.add_argument('--concurrency', type=int, default=20, help='Число параллельных клиентов.')
+    parser.add_argument('--tick-ms', type=int, default=50, help='Период тестовых Socket.IO-сообщений, мс.')
+    parser.add_argument('--serve', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.logins, args.tick_ms / 1000)
+    else:
+        run(args.logins, args.concurrency, args.tick_ms / 1000)
@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from datetime import datetime, timezone
+from blocking_calls import run_blocking
 import enum
 
 db = SQLAlchemy()
@@ -15,7 +16,7 @@ class EventLocation(enum.Enum):
 
 class EventType(enum.Enum):
     SOCIAL = "Общественное"
-    CULTURAL = "Культурно-творческое",
+    CULTURAL = "Культурно-творческое"
     SPORTS = "Спортивное"
     EDUCATIONAL = "Просветительское"
     OTHER = "Другое"
@@ -25,6 +26,20 @@ class ParticipantRoleEnum(enum.Enum):
     VOLUNTEER = "Волонтёр"
     ORGANIZER = "Организатор"
 
+class EventStatus(enum.Enum):
+    UPCOMING = "upcoming"
+    ONGOING = "ongoing"
+    FINISHED = "finished"
+    ARCHIVED = "archived"
+
+ACTIVE_EVENT_STATUSES = (EventStatus.UPCOMING, EventStatus.ONGOING)
+ARCHIVE_EVENT_STATUSES = (EventStatus.FINISHED, EventStatus.ARCHIVED)
+
+def as_utc(dt: datetime) -> datetime:
+    if dt is None or dt.tzinfo is not None:
+        return dt
+    return dt.replace(tzinfo=timezone.utc)
+
 class Role(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.Enum(ParticipantRoleEnum), unique=True, nullable=False)
@@ -47,14 +62,20 @@ class User(db.Model):
     notifications_enabled = db.Column(db.Boolean, default=True, nullable=False)
     authored_events = db.relationship('Event', backref='author', lazy=True, cascade="all, delete-orphan")
     avatar_url = db.Column(db.String(500), nullable=True)
+    avatar_variants = db.Column(db.JSON, nullable=True)
     notifications = db.relationship('Notification', backref='user', lazy='dynamic', cascade="all, delete-orphan")
     participations = db.relationship('Participation', backref='user', lazy='dynamic', cascade="all, delete-orphan")
+    broadcast_read_up_to = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    unread_notifications_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    auth_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    broadcast_reads = db.relationship('BroadcastRead', backref='user', lazy='dynamic', cascade="all, delete-orphan")
+    notification_opt_outs = db.relationship('NotificationOptOut', lazy='dynamic', cascade="all, delete-orphan")
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = run_blocking(bcrypt.generate_password_hash, password).decode('utf-8')
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return run_blocking(bcrypt.check_password_hash, self.password_hash, password)
     
     def to_dict(self):
         return {
@@ -63,6 +84,7 @@ class User(db.Model):
             'email': self.email,
             'is_admin': self.is_admin,
             'avatarUrl': self.avatar_url,
+            'avatarVariants': self.avatar_variants,
             'notifications_enabled': self.notifications_enabled
         }
 
@@ -78,6 +100,11 @@ class Notification(db.Model):
     event_id = db.Column(db.Integer, db.ForeignKey('event.id', ondelete='CASCADE'), nullable=True)
     event = db.relationship('Event', backref=db.backref('notifications', lazy=True, cascade="all, delete-orphan"))
 
+    __table_args__ = (
+        db.Index('ix_notification_user_read_created', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notification_read_created', 'is_read', 'created_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -91,6 +118,53 @@ class Notification(db.Model):
     def __repr__(self):
         return f'<Notification {self.id} for User {self.user_id}>'
 
+class BroadcastNotification(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    message = db.Column(db.String(500), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id', ondelete='CASCADE'), nullable=True)
+    event = db.relationship('Event', backref=db.backref('broadcast_notifications', lazy=True, cascade="all, delete-orphan"))
+    reads = db.relationship('BroadcastRead', backref='broadcast', lazy='dynamic', cascade="all, delete-orphan")
+
+    __table_args__ = (
+        db.Index('ix_broadcast_notification_created', 'created_at'),
+        db.Index('ix_broadcast_notification_event', 'event_id', 'created_at'),
+    )
+
+    def to_dict(self, is_read: bool):
+        return {
+            'id': f'broadcast-{self.id}',
+            'message': self.message,
+            'is_read': bool(is_read),
+            'created_at': self.created_at.isoformat(),
+            'event_id': self.event_id,
+            'event_title': self.event.title if self.event else None,
+            'is_broadcast': True,
+        }
+
+    def __repr__(self):
+        return f'<BroadcastNotification {self.id}>'
+
+class BroadcastRead(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    broadcast_id = db.Column(db.Integer, db.ForeignKey('broadcast_notification.id', ondelete='CASCADE'), primary_key=True)
+
+    def __repr__(self):
+        return f'<BroadcastRead User:{self.user_id} Broadcast:{self.broadcast_id}>'
+
+class NotificationOptOut(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    ended_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_notification_opt_out_user_started', 'user_id', 'started_at'),
+    )
+
+    def __repr__(self):
+        return f'<NotificationOptOut User:{self.user_id} {self.started_at}-{self.ended_at}>'
+
 class Participation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -104,7 +178,11 @@ class Participation(db.Model):
     event = db.relationship('Event', backref=db.backref('participations', lazy=True, cascade="all, delete-orphan"))
     role = db.relationship('Role')
 
-    __table_args__ = (db.UniqueConstraint('user_id', 'event_id', name='_user_event_uc'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'event_id', name='_user_event_uc'),
+        db.Index('ix_participation_event_id', 'event_id'),
+        db.Index('ix_participation_reminder_event', 'reminder_sent_at', 'event_id'),
+    )
 
     def to_dict(self):
         return {
@@ -119,6 +197,7 @@ class Participation(db.Model):
             'event_start_datetime': self.event.start_datetime.isoformat(),
             'event_end_datetime': self.event.end_datetime.isoformat() if self.event.end_datetime else None,
             'event_image_url': self.event.image_url,
+            'event_image_variants': self.event.image_variants,
             'event_location': self.event.location.value,
             'reminder_sent_at': self.reminder_sent_at.isoformat() if self.reminder_sent_at else None,
         }
@@ -145,12 +224,34 @@ class Event(db.Model):
     registration_link_volunteer = db.Column(db.String(500), nullable=True)
     registration_link_organizer = db.Column(db.String(500), nullable=True)
     image_url = db.Column(db.String(500), nullable=True)
+    image_variants = db.Column(db.JSON, nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     notification_sent_at = db.Column(db.DateTime, nullable=True)
     is_archived = db.Column(db.Boolean, default=False, nullable=False, server_default='false')
     archived_at = db.Column(db.DateTime, nullable=True)
+    status = db.Column(db.Enum(EventStatus), nullable=False, default=EventStatus.UPCOMING, server_default=EventStatus.UPCOMING.name)
+
+    __table_args__ = (
+        db.Index('ix_event_status_start', 'status', 'start_datetime'),
+        db.Index('ix_event_notification_sent_start', 'notification_sent_at', 'start_datetime'),
+        db.Index('ix_event_updated_at', 'updated_at'),
+    )
+
+    def compute_status(self, now_utc: datetime) -> EventStatus:
+        if self.is_archived:
+            return EventStatus.ARCHIVED
+        start_utc = as_utc(self.start_datetime)
+        end_utc = as_utc(self.end_datetime)
+        if end_utc is None:
+            return EventStatus.UPCOMING if start_utc >= now_utc else EventStatus.FINISHED
+        if end_utc < now_utc:
+            return EventStatus.FINISHED
+        return EventStatus.ONGOING if start_utc <= now_utc else EventStatus.UPCOMING
+
+    def refresh_status(self, now_utc: datetime = None):
+        self.status = self.compute_status(now_utc or datetime.now(timezone.utc))
 
     def to_dict(self):
         return {
@@ -167,13 +268,108 @@ class Event(db.Model):
             'registration_link_volunteer': self.registration_link_volunteer,
             'registration_link_organizer': self.registration_link_organizer,
             'image_url': self.image_url,
+            'image_variants': self.image_variants,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'author_id': self.author_id,
             'author_username': self.author.username if self.author else None,
             'is_archived': self.is_archived,
-            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None,
+            'status': self.status.value if self.status else None
         }
 
+    def to_card_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'start_datetime': self.start_datetime.isoformat() if self.start_datetime else None,
+            'end_datetime': self.end_datetime.isoformat() if self.end_datetime else None,
+            'location': self.location.value if self.location else None,
+            'event_type': self.event_type.value if self.event_type else None,
+            'image_url': self.image_url,
+            'image_variants': self.image_variants,
+            'status': self.status.value if self.status else None
+        }
+
+    def __repr__(self):
+        return f'<Event {self.title}>'
+
+class JobStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    idempotency_key = db.Column(db.String(200), unique=True, nullable=True)
+    status = db.Column(db.Enum(JobStatus), nullable=False, default=JobStatus.PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_after = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_job_status_run_after', 'status', 'run_after'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status.value,
+            'idempotency_key': self.idempotency_key,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'last_error': self.last_error,
+            'result': self.result,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status.value}>'
+
+class SchedulerLease(db.Model):
+    name = db.Column(db.String(100), primary_key=True)
+    holder = db.Column(db.String(200), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    renewed_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'acquired_at': self.acquired_at.isoformat(),
+            'renewed_at': self.renewed_at.isoformat(),
+            'expires_at': self.expires_at.isoformat(),
+        }
+
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} held by {self.holder}>'
+
+class RateLimitBucket(db.Model):
+    key = db.Column(db.String(200), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<RateLimitBucket {self.key} {self.tokens:.2f}>'
+
+class StoredFile(db.Model):
+    name = db.Column(db.String(100), primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
     def __repr__(self):
-        return f'<Event {self.title}>'
\ No newline at end of file
+        return f'<StoredFile {self.name} refs={self.ref_count}>'
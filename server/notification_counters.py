@@ -0,0 +1,80 @@
+import logging
+from sqlalchemy import update, select, func, case
+from models import db, User, Notification
+from broadcasts import unread_broadcasts_count
+
+logger = logging.getLogger(__name__)
+
+def increment_unread(user_id: int, amount: int = 1):
+    if amount <= 0:
+        return
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(unread_notifications_count=User.unread_notifications_count + amount)
+        .execution_options(synchronize_session=False)
+    )
+
+def increment_unread_many(counts_by_user: dict):
+    users_by_amount = {}
+    for user_id, amount in counts_by_user.items():
+        users_by_amount.setdefault(amount, []).append(user_id)
+    for amount, user_ids in users_by_amount.items():
+        db.session.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(unread_notifications_count=User.unread_notifications_count + amount)
+            .execution_options(synchronize_session=False)
+        )
+
+def decrement_unread(user_id: int, amount: int = 1):
+    if amount <= 0:
+        return
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(unread_notifications_count=case(
+            (User.unread_notifications_count > amount, User.unread_notifications_count - amount),
+            else_=0
+        ))
+        .execution_options(synchronize_session=False)
+    )
+
+def discount_unread_for_event(event_id: int):
+    unread_for_event = select(func.count(Notification.id)).where(
+        Notification.user_id == User.id,
+        Notification.event_id == event_id,
+        Notification.is_read == False
+    ).scalar_subquery()
+    affected_users = select(Notification.user_id).where(
+        Notification.event_id == event_id,
+        Notification.is_read == False
+    )
+    db.session.execute(
+        update(User)
+        .where(User.id.in_(affected_users))
+        .values(unread_notifications_count=case(
+            (User.unread_notifications_count > unread_for_event, User.unread_notifications_count - unread_for_event),
+            else_=0
+        ))
+        .execution_options(synchronize_session=False)
+    )
+
+def recount_unread_notifications() -> int:
+    actual_unread = select(func.count(Notification.id)).where(
+        Notification.user_id == User.id,
+        Notification.is_read == False
+    ).scalar_subquery()
+    result = db.session.execute(
+        update(User)
+        .where(User.unread_notifications_count != actual_unread)
+        .values(unread_notifications_count=actual_unread)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    logger.info(f"Unread notification counters recomputed: {result.rowcount} users corrected.")
+    return result.rowcount
+
+def unread_notifications_count(user: User) -> int:
+    personal = db.session.query(User.unread_notifications_count).filter(User.id == user.id).scalar() or 0
+    return personal + unread_broadcasts_count(user)
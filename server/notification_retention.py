@@ -0,0 +1,91 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func
+from models import db, Notification
+from notification_counters import decrement_unread
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def expired_notifications_query(cutoff: datetime):
+    return db.session.query(Notification.id).filter(
+        Notification.is_read == True,
+        Notification.created_at < cutoff
+    )
+
+def _pause_between_batches():
+    if Config.NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS > 0:
+        time.sleep(Config.NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS)
+
+def _delete_batch(notification_ids: list):
+    db.session.execute(
+        delete(Notification)
+        .where(Notification.id.in_(notification_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+def delete_expired_notifications(cutoff: datetime, batch_size: int) -> int:
+    deleted = 0
+    while True:
+        notification_ids = [notification_id for (notification_id,) in expired_notifications_query(cutoff).limit(batch_size).all()]
+        if not notification_ids:
+            return deleted
+        _delete_batch(notification_ids)
+        db.session.commit()
+        deleted += len(notification_ids)
+        _pause_between_batches()
+
+def users_over_cap_query(max_per_user: int):
+    return db.session.query(Notification.user_id).group_by(Notification.user_id).having(func.count(Notification.id) > max_per_user)
+
+def trim_user_notifications(user_id: int, max_per_user: int, batch_size: int) -> int:
+    deleted = 0
+    while True:
+        excess = (
+            db.session.query(Notification.id, Notification.is_read)
+            .filter(Notification.user_id == user_id)
+            .order_by(Notification.created_at.desc(), Notification.id.desc())
+            .offset(max_per_user)
+            .limit(batch_size)
+            .all()
+        )
+        if not excess:
+            return deleted
+        _delete_batch([notification_id for notification_id, _ in excess])
+        decrement_unread(user_id, sum(1 for _, is_read in excess if not is_read))
+        db.session.commit()
+        deleted += len(excess)
+        _pause_between_batches()
+
+def enforce_notification_retention(now_utc: datetime = None, retention_days: int = None, max_per_user: int = None, batch_size: int = None) -> dict:
+    now_utc = now_utc or datetime.now(timezone.utc)
+    retention_days = Config.NOTIFICATION_RETENTION_DAYS if retention_days is None else retention_days
+    max_per_user = Config.NOTIFICATION_MAX_PER_USER if max_per_user is None else max_per_user
+    batch_size = batch_size or Config.NOTIFICATION_RETENTION_BATCH_SIZE
+    started = time.monotonic()
+
+    expired = 0
+    if retention_days > 0:
+        expired = delete_expired_notifications(now_utc - timedelta(days=retention_days), batch_size)
+
+    over_cap = 0
+    trimmed_users = 0
+    if max_per_user > 0:
+        for (user_id,) in users_over_cap_query(max_per_user).all():
+            over_cap += trim_user_notifications(user_id, max_per_user, batch_size)
+            trimmed_users += 1
+
+    report = {
+        'expired': expired,
+        'over_cap': over_cap,
+        'trimmed_users': trimmed_users,
+        'reclaimed': expired + over_cap,
+        'duration_seconds': round(time.monotonic() - started, 3),
+    }
+    if report['reclaimed']:
+        logger.info(
+            f"Notification retention reclaimed {report['reclaimed']} rows: {expired} read older than {retention_days} days, "
+            f"{over_cap} over the {max_per_user}-per-user cap ({trimmed_users} users) in {report['duration_seconds']}s."
+        )
+    return report
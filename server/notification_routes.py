@@ -1,10 +1,109 @@
+import heapq
 import logging
-from flask import jsonify
+from datetime import datetime
+from itertools import islice
+from typing import Optional
+from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Notification
+from sqlalchemy import func, case, update
+from sqlalchemy.orm import joinedload, load_only, lazyload
+from models import db, User, Notification, Event, BroadcastNotification, as_utc
+from http_cache import make_etag, conditional_json
+from streaming import wants_stream, stream_json_items
+from pagination import PaginationError, parse_limit, encode_cursor, paginate_keyset
+from broadcasts import (
+    broadcast_feed_query, broadcast_is_read_expression, visible_broadcasts_filter, is_broadcast_visible,
+    broadcasts_signature, mark_broadcast_read, mark_all_broadcasts_read
+)
+from notification_counters import decrement_unread, unread_notifications_count
+from config import Config
 
 logger = logging.getLogger(__name__)
 
+def notifications_feed_query(user_id):
+    return Notification.query.filter(Notification.user_id == user_id).order_by(
+        Notification.is_read.asc(), Notification.created_at.desc()
+    )
+
+def _event_title_only(relationship):
+    return joinedload(relationship).options(load_only(Event.id, Event.title), lazyload(Event.roles))
+
+def _feed_sort_key(notification_dict: dict):
+    return notification_dict['is_read'], -datetime.fromisoformat(notification_dict['created_at']).timestamp()
+
+def iter_notification_feed(user, batch_size: int = None):
+    batch_size = batch_size or Config.STREAM_BATCH_SIZE
+    personal = (
+        notification.to_dict()
+        for notification in notifications_feed_query(user.id).options(_event_title_only(Notification.event)).yield_per(batch_size)
+    )
+    broadcasts = (
+        broadcast.to_dict(is_read)
+        for broadcast, is_read in broadcast_feed_query(user).options(_event_title_only(BroadcastNotification.event)).yield_per(batch_size)
+    )
+    return heapq.merge(personal, broadcasts, key=_feed_sort_key)
+
+def _page_sort_key(item: tuple):
+    return item[0], item[1]
+
+def load_notification_page(user, limit: int, cursor: Optional[str]):
+    personal_query = Notification.query.filter(Notification.user_id == user.id).options(_event_title_only(Notification.event))
+    personal_rows, personal_next = paginate_keyset(
+        personal_query, Notification.created_at, Notification.id, True, limit, cursor,
+        row_key=lambda notification: (notification.created_at, notification.id)
+    )
+
+    broadcast_query = db.session.query(
+        BroadcastNotification, broadcast_is_read_expression(user).label('is_read')
+    ).filter(visible_broadcasts_filter(user)).options(_event_title_only(BroadcastNotification.event))
+    broadcast_rows, broadcast_next = paginate_keyset(
+        broadcast_query, BroadcastNotification.created_at, -BroadcastNotification.id, True, limit, cursor,
+        row_key=lambda row: (row[0].created_at, -row[0].id)
+    )
+
+    merged = heapq.merge(
+        ((as_utc(notification.created_at), notification.id, notification.to_dict()) for notification in personal_rows),
+        ((as_utc(broadcast.created_at), -broadcast.id, broadcast.to_dict(is_read)) for broadcast, is_read in broadcast_rows),
+        key=_page_sort_key,
+        reverse=True
+    )
+    page = list(islice(merged, limit + 1))
+    has_more = len(page) > limit or personal_next is not None or broadcast_next is not None
+    page = page[:limit]
+    next_cursor = encode_cursor(page[-1][0], page[-1][1]) if page and has_more else None
+    return [item for _, _, item in page], next_cursor
+
+def notifications_etag(user) -> str:
+    total, max_id, unread, max_event_updated_at = db.session.query(
+        func.count(Notification.id),
+        func.max(Notification.id),
+        func.sum(case((Notification.is_read == False, 1), else_=0)),
+        func.max(Event.updated_at)
+    ).outerjoin(Event, Notification.event_id == Event.id).filter(Notification.user_id == user.id).one()
+    return make_etag('notifications', user.id, total, max_id, unread or 0, max_event_updated_at, *broadcasts_signature(user))
+
+def mark_notifications_read(user_id: int, up_to_id: Optional[int] = None, up_to: Optional[datetime] = None) -> int:
+    statement = update(Notification).where(Notification.user_id == user_id, Notification.is_read == False)
+    if up_to_id is not None:
+        statement = statement.where(Notification.id <= up_to_id)
+    if up_to is not None:
+        statement = statement.where(Notification.created_at <= up_to)
+    result = db.session.execute(statement.values(is_read=True).execution_options(synchronize_session=False))
+    decrement_unread(user_id, result.rowcount)
+    return result.rowcount
+
+def _parse_read_bound(payload: dict, key: str, parse):
+    value = payload.get(key)
+    if value is None:
+        return None
+    try:
+        return parse(value)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid '{key}' value: {value}") from e
+
+def _parse_timestamp(value: str) -> datetime:
+    return as_utc(datetime.fromisoformat(value.replace('Z', '+00:00')))
+
 def register_notification_routes(app):
 
     @app.route('/api/notifications', methods=['GET'])
@@ -15,9 +114,32 @@ def register_notification_routes(app):
         if not user:
             return jsonify({"error": "Пользователь не найден"}), 404
         
-        notifications = user.notifications.order_by(Notification.is_read.asc(), Notification.created_at.desc()).all()
-        
-        return jsonify([n.to_dict() for n in notifications]), 200
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            if limit is None:
+                if wants_stream(request.args):
+                    return stream_json_items(iter_notification_feed(user))
+                return conditional_json(notifications_etag(user), lambda: list(iter_notification_feed(user)))
+
+            cursor = request.args.get('cursor')
+
+            def build_page():
+                items, next_cursor = load_notification_page(user, limit, cursor)
+                return {"items": items, "next_cursor": next_cursor}
+
+            return conditional_json(make_etag('notifications-page', notifications_etag(user), limit, cursor), build_page)
+        except PaginationError as e:
+            logger.warning(f"Invalid pagination parameters for notifications of user {user.id}: {e}")
+            return jsonify({"error": "Некорректные параметры пагинации"}), 400
+
+    @app.route('/api/notifications/unread-count', methods=['GET'])
+    @jwt_required()
+    def get_unread_notifications_count():
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        if not user:
+            return jsonify({"error": "Пользователь не найден"}), 404
+        return jsonify({"unread_count": unread_notifications_count(user)}), 200
 
     @app.route('/api/notifications/<int:notification_id>/mark-as-read', methods=['POST'])
     @jwt_required()
@@ -34,6 +156,7 @@ def register_notification_routes(app):
         try:
             if not notification.is_read:
                 notification.is_read = True
+                decrement_unread(notification.user_id)
                 db.session.commit()
                 logger.info(f"Marked notification {notification_id} as read for user {current_user_id}")
             return jsonify(notification.to_dict()), 200
@@ -42,6 +165,28 @@ def register_notification_routes(app):
             logger.error(f"Error marking notification {notification_id} as read: {e}", exc_info=True)
             return jsonify({"error": "Ошибка сервера"}), 500
 
+    @app.route('/api/notifications/broadcast-<int:broadcast_id>/mark-as-read', methods=['POST'])
+    @jwt_required()
+    def mark_broadcast_notification_as_read(broadcast_id):
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        if not user:
+            return jsonify({"error": "Пользователь не найден"}), 404
+
+        broadcast = db.session.get(BroadcastNotification, broadcast_id)
+        if not broadcast or not is_broadcast_visible(user, broadcast):
+            return jsonify({"error": "Уведомление не найдено"}), 404
+
+        try:
+            if mark_broadcast_read(user, broadcast.id):
+                db.session.commit()
+                logger.info(f"Marked broadcast {broadcast_id} as read for user {current_user_id}")
+            return jsonify(broadcast.to_dict(is_read=True)), 200
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error marking broadcast {broadcast_id} as read: {e}", exc_info=True)
+            return jsonify({"error": "Ошибка сервера"}), 500
+
     @app.route('/api/notifications/mark-as-read', methods=['POST'])
     @jwt_required()
     def mark_notifications_as_read():
@@ -50,14 +195,27 @@ def register_notification_routes(app):
         if not user:
             return jsonify({"error": "Пользователь не найден"}), 404
             
+        payload = request.get_json(silent=True) or {}
         try:
-            unread_notifications = user.notifications.filter_by(is_read=False).all()
-            for notification in unread_notifications:
-                notification.is_read = True
-            
+            up_to_id = _parse_read_bound(payload, 'up_to_id', int)
+            up_to_broadcast_id = _parse_read_bound(payload, 'up_to_broadcast_id', int)
+            up_to = _parse_read_bound(payload, 'up_to', _parse_timestamp)
+        except ValueError as e:
+            logger.warning(f"Invalid mark-as-read bounds for user {user.id}: {e}")
+            return jsonify({"error": "Некорректные параметры запроса"}), 400
+
+        try:
+            only_broadcasts = up_to_broadcast_id is not None and up_to_id is None and up_to is None
+            only_personal = up_to_id is not None and up_to_broadcast_id is None and up_to is None
+            marked = 0
+            if not only_broadcasts:
+                marked = mark_notifications_read(user.id, up_to_id, up_to)
+            if not only_personal:
+                mark_all_broadcasts_read(user, up_to_broadcast_id, up_to)
+
             db.session.commit()
-            logger.info(f"Marked {len(unread_notifications)} notifications as read for user {user.id}")
-            return jsonify({"message": "Все уведомления помечены как прочитанные"}), 200
+            logger.info(f"Marked {marked} notifications as read for user {user.id} (up_to_id={up_to_id}, up_to_broadcast_id={up_to_broadcast_id}, up_to={up_to})")
+            return jsonify({"message": "Все уведомления помечены как прочитанные", "marked": marked}), 200
         except Exception as e:
             db.session.rollback()
             logger.error(f"Error marking notifications as read for user {user.id}: {e}", exc_info=True)
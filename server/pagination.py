@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import and_, or_
+from config import Config
+
+class PaginationError(ValueError):
+    pass
+
+def parse_limit(limit_str: Optional[str]) -> Optional[int]:
+    if limit_str is None or limit_str == '':
+        return None
+    try:
+        limit = int(limit_str)
+    except (ValueError, TypeError):
+        raise PaginationError(f"Invalid limit value: {limit_str}")
+    if limit < 1:
+        raise PaginationError(f"Limit must be positive: {limit}")
+    return min(limit, Config.MAX_PAGE_LIMIT)
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: Optional[str], sort_type=datetime) -> Optional[Tuple[object, int]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if sort_type is datetime:
+            return datetime.fromisoformat(sort_value), int(row_id)
+        if isinstance(sort_value, str):
+            raise TypeError(f"Expected {sort_type.__name__} sort value")
+        return sort_type(sort_value), int(row_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise PaginationError(f"Invalid cursor: {cursor}") from e
+
+def order_by_keyset(query, sort_column, id_column, descending: bool):
+    if descending:
+        return query.order_by(sort_column.desc(), id_column.desc())
+    return query.order_by(sort_column.asc(), id_column.asc())
+
+def paginate_keyset(query, sort_column, id_column, descending: bool, limit: int, cursor: Optional[str], row_key, sort_type=datetime):
+    position = decode_cursor(cursor, sort_type)
+    if position:
+        sort_value, row_id = position
+        if descending:
+            query = query.filter(or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id)))
+        else:
+            query = query.filter(or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > row_id)))
+
+    rows = order_by_keyset(query, sort_column, id_column, descending).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*row_key(rows[-1]))
@@ -1,29 +1,24 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import and_, or_
 from datetime import datetime, timezone
 import logging
 
-from models import db, User, Event, Participation, Role, ParticipantRoleEnum, Notification
+from models import db, Event, Participation, Role, ParticipantRoleEnum, Notification, EventStatus, ARCHIVE_EVENT_STATUSES
+from sqlalchemy.orm import contains_eager, joinedload
+from pagination import PaginationError, parse_limit, order_by_keyset, paginate_keyset
+from streaming import wants_stream, stream_json_array
+from reminder_scheduler import schedule_event_reminder
+from identity import current_identity
 
 logger = logging.getLogger(__name__)
 
-def get_user_or_404(user_id):
-    user = User.query.get(user_id)
-    if not user:
-        logger.warning(f"User with ID {user_id} not found.")
-    return user
-
 def register_participation_routes(app):
 
     @app.route('/api/events/<int:event_id>/participate', methods=['POST'])
     @jwt_required()
     def participate_in_event(event_id):
         current_user_id = get_jwt_identity()
-        user = get_user_or_404(current_user_id)
-        if not user:
-            return jsonify({"error": "Пользователь не найден"}), 404
 
         event = Event.query.get(event_id)
         if not event:
@@ -50,6 +45,7 @@ def register_participation_routes(app):
             )
             db.session.add(new_participation)
             db.session.commit()
+            schedule_event_reminder(event)
             logger.info(f"User {current_user_id} successfully registered for event {event_id}.")
             return jsonify({"message": "Вы успешно записались на мероприятие!"}), 201
         except IntegrityError:
@@ -64,9 +60,6 @@ def register_participation_routes(app):
     @jwt_required()
     def unparticipate_in_event(event_id):
         current_user_id = get_jwt_identity()
-        user = get_user_or_404(current_user_id)
-        if not user:
-            return jsonify({"error": "Пользователь не найден"}), 404
 
         participation = Participation.query.filter_by(user_id=current_user_id, event_id=event_id).first()
         if not participation:
@@ -85,58 +78,56 @@ def register_participation_routes(app):
     @app.route('/api/me/participations', methods=['GET'])
     @jwt_required()
     def get_user_participations():
-        current_user_id = get_jwt_identity()
-        user = get_user_or_404(current_user_id)
-        if not user:
-            return jsonify({"error": "Пользователь не найден"}), 404
-        
-        now_utc = datetime.now(timezone.utc)
+        user = current_identity()
         
         status_param = request.args.get('status', 'all') 
 
-        query = user.participations.join(Event) 
+        query = Participation.query.filter(Participation.user_id == user.id).join(Event) 
         
         if status_param == 'upcoming':
-            query = query.filter(Event.start_datetime >= now_utc)
+            query = query.filter(Event.status == EventStatus.UPCOMING)
         elif status_param == 'past':
-            query = query.filter(
-                or_(
-                    and_(Event.end_datetime.is_(None), Event.start_datetime < now_utc),
-                    Event.end_datetime < now_utc
-                )
-            )
+            query = query.filter(Event.status.in_(ARCHIVE_EVENT_STATUSES))
         
         query = query.filter(Participation.is_registered == True)
 
-        if status_param == 'past':
-            query = query.order_by(Event.start_datetime.desc())
-        else:
-            query = query.order_by(Event.start_datetime.asc())
-
+        descending = status_param == 'past'
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            if limit is None and wants_stream(request.args):
+                query = query.options(
+                    contains_eager(Participation.event).lazyload(Event.roles), joinedload(Participation.role)
+                )
+                return stream_json_array(
+                    order_by_keyset(query, Event.start_datetime, Participation.id, descending), Participation.to_dict
+                )
+            if limit is None:
+                participations = order_by_keyset(query, Event.start_datetime, Participation.id, descending).all()
+                return jsonify([p.to_dict() for p in participations]), 200
 
-        participations = query.all()
+            participations, next_cursor = paginate_keyset(
+                query, Event.start_datetime, Participation.id, descending, limit, request.args.get('cursor'),
+                row_key=lambda participation: (participation.event.start_datetime, participation.id)
+            )
+        except PaginationError as e:
+            logger.warning(f"Invalid pagination parameters for participations of user {user.id}: {e}")
+            return jsonify({"error": "Некорректные параметры пагинации"}), 400
 
-        participations_data = [p.to_dict() for p in participations]
-        return jsonify(participations_data), 200
+        return jsonify({
+            "items": [p.to_dict() for p in participations],
+            "next_cursor": next_cursor
+        }), 200
 
     @app.route('/api/me/participations/count', methods=['GET'])
     @jwt_required()
     def get_user_participations_count():
-        current_user_id = get_jwt_identity()
-        user = get_user_or_404(current_user_id)
-        if not user:
-            return jsonify({"error": "Пользователь не найден"}), 404
-        
-        now_utc = datetime.now(timezone.utc)
+        user = current_identity()
         
-        total_registered = user.participations.filter_by(is_registered=True).count()
+        total_registered = Participation.query.filter(Participation.user_id == user.id, Participation.is_registered == True).count()
 
-        attended_events_count = user.participations.join(Event).filter(
+        attended_events_count = Participation.query.filter(Participation.user_id == user.id).join(Event).filter(
             Participation.is_registered == True,
-            or_(
-                and_(Event.end_datetime.is_(None), Event.start_datetime < now_utc),
-                Event.end_datetime < now_utc
-            )
+            Event.status.in_(ARCHIVE_EVENT_STATUSES)
         ).count()
 
 
@@ -0,0 +1,79 @@
+import logging
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from sqlalchemy import event, text, func
+from models import db, Event, User, EventLocation, ParticipantRoleEnum
+from event_routes import build_events_query
+from notification_routes import notifications_feed_query
+from broadcasts import broadcast_feed_query
+from notification_retention import expired_notifications_query
+from reminders import upcoming_events_to_notify_query, upcoming_participations_to_notify_query
+
+logger = logging.getLogger(__name__)
+
+HOT_TABLES = ('event', 'notification', 'participation', 'broadcast_notification')
+
+_SQLITE_FULL_SCAN = re.compile(r'^SCAN (\w+)(?! USING)')
+_POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+def hot_queries(now_utc: datetime) -> dict:
+    return {
+        'get_events(status=active)': build_events_query({'status': 'active'})[0].order_by(Event.start_datetime.asc()),
+        'get_events(status=archive)': build_events_query({'status': 'archive'})[0].order_by(Event.start_datetime.desc()),
+        'get_events(status=active, location, role)': build_events_query(
+            {'status': 'active', 'location': EventLocation.CENTRAL, 'role': ParticipantRoleEnum.VOLUNTEER}
+        )[0].order_by(Event.start_datetime.asc()),
+        'check_upcoming_events(events)': upcoming_events_to_notify_query(now_utc),
+        'check_upcoming_events(participations)': upcoming_participations_to_notify_query(now_utc),
+        'reminder_schedule_signature': db.session.query(func.max(Event.updated_at)),
+        'get_notifications': notifications_feed_query(1),
+        'prune_notifications(expired)': expired_notifications_query(now_utc),
+        'get_notifications(broadcasts)': broadcast_feed_query(
+            User(id=1, is_admin=False, notifications_enabled=True, created_at=now_utc, broadcast_read_up_to=0)
+        ),
+    }
+
+@contextmanager
+def _explain_statements(engine, prefix: str):
+    def add_prefix(conn, cursor, statement, parameters, context, executemany):
+        return prefix + statement, parameters
+
+    event.listen(engine, 'before_cursor_execute', add_prefix, retval=True)
+    try:
+        yield
+    finally:
+        event.remove(engine, 'before_cursor_execute', add_prefix)
+
+def explain(query) -> list:
+    engine = db.engine
+    with engine.connect() as connection:
+        if engine.dialect.name == 'postgresql':
+            connection.execute(text("SET enable_seqscan = off"))
+            prefix = 'EXPLAIN '
+        else:
+            prefix = 'EXPLAIN QUERY PLAN '
+        with _explain_statements(engine, prefix):
+            rows = connection.execute(query.statement).fetchall()
+        connection.rollback()
+    return [str(row[-1]) for row in rows]
+
+def find_full_scans(plan: list, dialect_name: str) -> list:
+    pattern = _POSTGRES_FULL_SCAN if dialect_name == 'postgresql' else _SQLITE_FULL_SCAN
+    full_scans = []
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match and match.group(1) in HOT_TABLES:
+            full_scans.append(line.strip())
+    return full_scans
+
+def check_query_plans() -> list:
+    dialect_name = db.engine.dialect.name
+    results = []
+    for name, query in hot_queries(datetime.now(timezone.utc)).items():
+        plan = explain(query)
+        full_scans = find_full_scans(plan, dialect_name)
+        if full_scans:
+            logger.warning(f"Query '{name}' falls back to a full scan: {full_scans}")
+        results.append({'name': name, 'plan': plan, 'full_scans': full_scans})
+    return results
@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import update, select, insert, delete, case, func
+from sqlalchemy.exc import IntegrityError
+from models import db, RateLimitBucket
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class MemoryBucketStore:
+    name = 'memory'
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, refill_per_second: float, now: float) -> float:
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / refill_per_second
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def reset(self, key: str):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def prune(self, idle_seconds: float, now: float) -> int:
+        with self._lock:
+            idle = [key for key, (_, updated_at) in self._buckets.items() if updated_at < now - idle_seconds]
+            for key in idle:
+                del self._buckets[key]
+            return len(idle)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._buckets)
+
+
+class DatabaseBucketStore:
+    name = 'database'
+
+    def consume(self, key: str, capacity: float, refill_per_second: float, now: float) -> float:
+        try:
+            return self._consume(key, capacity, refill_per_second, now)
+        except IntegrityError:
+            return self._consume(key, capacity, refill_per_second, now)
+
+    def _consume(self, key: str, capacity: float, refill_per_second: float, now: float) -> float:
+        bucket = RateLimitBucket.__table__
+        refilled = bucket.c.tokens + (now - bucket.c.updated_at) * refill_per_second
+        refilled = case((refilled > capacity, capacity), else_=refilled)
+        with db.engine.begin() as conn:
+            taken = conn.execute(
+                update(bucket).where(bucket.c.key == key, refilled >= 1).values(tokens=refilled - 1, updated_at=now)
+            ).rowcount
+            if taken:
+                return 0.0
+            row = conn.execute(select(bucket.c.tokens, bucket.c.updated_at).where(bucket.c.key == key)).first()
+            if row is None:
+                conn.execute(insert(bucket).values(key=key, tokens=capacity - 1, updated_at=now))
+                return 0.0
+        tokens = min(capacity, row.tokens + (now - row.updated_at) * refill_per_second)
+        return (1 - tokens) / refill_per_second
+
+    def reset(self, key: str):
+        with db.engine.begin() as conn:
+            conn.execute(delete(RateLimitBucket.__table__).where(RateLimitBucket.key == key))
+
+    def prune(self, idle_seconds: float, now: float) -> int:
+        with db.engine.begin() as conn:
+            return conn.execute(
+                delete(RateLimitBucket.__table__).where(RateLimitBucket.updated_at < now - idle_seconds)
+            ).rowcount
+
+    def size(self) -> int:
+        with db.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(RateLimitBucket.__table__)).scalar()
+
+
+class LoginRateLimiter:
+    def __init__(self, store, ip_burst: int, ip_per_minute: float, email_burst: int, email_per_minute: float, enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+        self.limits = {
+            'ip': (ip_burst, ip_per_minute / 60),
+            'email': (email_burst, email_per_minute / 60),
+        }
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.throttled = {'ip': 0, 'email': 0}
+        self.store_errors = 0
+        self.pruned = 0
+
+    def _consume(self, scope: str, value: str, now: float) -> float:
+        capacity, refill_per_second = self.limits[scope]
+        try:
+            return self.store.consume(f"{scope}:{value}", capacity, refill_per_second, now)
+        except Exception as e:
+            with self._lock:
+                self.store_errors += 1
+            logger.error(f"Login rate limit store failed for {scope} bucket: {e}", exc_info=True)
+            return 0.0
+
+    def check(self, ip: str, email: str) -> float:
+        if not self.enabled:
+            return 0.0
+        now = time.time()
+        for scope, value in (('ip', ip or 'unknown'), ('email', email.strip().lower())):
+            retry_after = self._consume(scope, value, now)
+            if retry_after > 0:
+                with self._lock:
+                    self.throttled[scope] += 1
+                logger.warning(f"Login throttled by {scope} bucket for {value}, retry in {retry_after:.1f}s")
+                return retry_after
+        with self._lock:
+            self.allowed += 1
+        return 0.0
+
+    def record_success(self, email: str):
+        if not self.enabled:
+            return
+        try:
+            self.store.reset(f"email:{email.strip().lower()}")
+        except Exception as e:
+            with self._lock:
+                self.store_errors += 1
+            logger.error(f"Could not reset login rate limit for {email}: {e}", exc_info=True)
+
+    def prune(self) -> int:
+        idle_seconds = max(capacity / refill_per_second for capacity, refill_per_second in self.limits.values())
+        pruned = self.store.prune(idle_seconds, time.time())
+        with self._lock:
+            self.pruned += pruned
+        if pruned:
+            logger.info(f"Login rate limit buckets pruned: {pruned}")
+        return pruned
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                'enabled': self.enabled,
+                'backend': self.store.name,
+                'allowed': self.allowed,
+                'throttled_ip': self.throttled['ip'],
+                'throttled_email': self.throttled['email'],
+                'store_errors': self.store_errors,
+                'pruned': self.pruned,
+                'limits': {
+                    scope: {'burst': capacity, 'per_minute': round(refill_per_second * 60, 3)}
+                    for scope, (capacity, refill_per_second) in self.limits.items()
+                },
+            }
+        try:
+            stats['tracked_keys'] = self.store.size()
+        except Exception as e:
+            logger.error(f"Could not count login rate limit buckets: {e}", exc_info=True)
+            stats['tracked_keys'] = None
+        return stats
+
+
+def build_login_rate_limiter() -> LoginRateLimiter:
+    if Config.LOGIN_RATE_LIMIT_BACKEND == 'database':
+        store = DatabaseBucketStore()
+    else:
+        store = MemoryBucketStore(Config.LOGIN_RATE_LIMIT_MAX_KEYS)
+    return LoginRateLimiter(
+        store,
+        Config.LOGIN_IP_BURST, Config.LOGIN_IP_PER_MINUTE,
+        Config.LOGIN_EMAIL_BURST, Config.LOGIN_EMAIL_PER_MINUTE,
+        enabled=Config.LOGIN_RATE_LIMIT_ENABLED
+    )
+
+login_rate_limiter = build_login_rate_limiter()
@@ -0,0 +1,95 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import update, insert
+from models import db, Event, Participation, Notification
+from reminders import upcoming_participations_to_notify_query, reminder_message
+from notification_counters import increment_unread_many
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_run_history = deque(maxlen=Config.REMINDER_METRICS_HISTORY)
+_history_lock = threading.Lock()
+
+def claim_participation_reminders(now_utc: datetime, event_id: Optional[int], chunk_size: int) -> list:
+    candidates = upcoming_participations_to_notify_query(now_utc, event_id).with_entities(Participation.id).correlate(None).limit(chunk_size)
+    if db.engine.dialect.name == 'postgresql':
+        candidates = candidates.with_for_update(skip_locked=True, of=Participation)
+    claimed = db.session.execute(
+        update(Participation)
+        .where(Participation.id.in_(candidates.scalar_subquery()), Participation.reminder_sent_at.is_(None))
+        .values(reminder_sent_at=now_utc)
+        .returning(Participation.id, Participation.user_id, Participation.event_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return [(participation_id, user_id, claimed_event_id) for participation_id, user_id, claimed_event_id in claimed]
+
+def _store_reminders(claimed: list, now_utc: datetime) -> list:
+    events = {
+        event.id: event
+        for event in Event.query.filter(Event.id.in_({claimed_event_id for _, _, claimed_event_id in claimed})).all()
+    }
+    reminders = [
+        {'user_id': user_id, 'event_id': claimed_event_id, 'message': reminder_message(events[claimed_event_id])}
+        for _, user_id, claimed_event_id in claimed
+    ]
+    db.session.execute(
+        insert(Notification),
+        [dict(reminder, is_read=False, created_at=now_utc) for reminder in reminders]
+    )
+    increment_unread_many(Counter(reminder['user_id'] for reminder in reminders))
+    return reminders
+
+def deliver_participation_reminders(now_utc: datetime, event_id: Optional[int] = None, chunk_size: int = None, on_delivered=None) -> dict:
+    chunk_size = chunk_size or Config.REMINDER_CHUNK_SIZE
+    started = time.monotonic()
+    metrics = {
+        'started_at': now_utc.isoformat(),
+        'event_id': event_id,
+        'processed': 0,
+        'chunks': 0,
+        'failures': 0,
+        'emit_failures': 0,
+    }
+
+    while True:
+        try:
+            claimed = claim_participation_reminders(now_utc, event_id, chunk_size)
+            if not claimed:
+                db.session.rollback()
+                break
+            reminders = _store_reminders(claimed, now_utc)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            metrics['failures'] += 1
+            logger.error(f"Participation reminder chunk failed for event {event_id}: {e}", exc_info=True)
+            break
+
+        metrics['processed'] += len(reminders)
+        metrics['chunks'] += 1
+        if on_delivered:
+            for reminder in reminders:
+                try:
+                    on_delivered(reminder)
+                except Exception as e:
+                    metrics['emit_failures'] += 1
+                    logger.error(f"Failed to emit reminder to user {reminder['user_id']} for event {reminder['event_id']}: {e}", exc_info=True)
+
+    metrics['duration_seconds'] = round(time.monotonic() - started, 3)
+    with _history_lock:
+        _run_history.append(metrics)
+    if metrics['processed'] or metrics['failures']:
+        logger.info(
+            f"Participation reminders: {metrics['processed']} sent in {metrics['chunks']} chunks, "
+            f"{metrics['failures']} failed chunks, {metrics['emit_failures']} failed emits in {metrics['duration_seconds']}s."
+        )
+    return metrics
+
+def reminder_run_history() -> list:
+    with _history_lock:
+        return list(_run_history)
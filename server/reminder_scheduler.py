@@ -0,0 +1,133 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from apscheduler.jobstores.base import JobLookupError
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
+from models import db, Event, EventStatus, Participation, as_utc
+from reminders import REMINDER_WINDOW_START, REMINDER_WINDOW_END
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+REMINDER_JOB_PREFIX = 'event-reminder:'
+RETRY_JOB_PREFIX = 'event-reminder-retry:'
+
+def reminder_due_at(event: Event, now_utc: datetime) -> Optional[datetime]:
+    if event.status != EventStatus.UPCOMING or event.start_datetime is None:
+        return None
+    start_utc = as_utc(event.start_datetime)
+    if start_utc - REMINDER_WINDOW_START < now_utc:
+        return None
+    return max(start_utc - REMINDER_WINDOW_END, now_utc)
+
+
+class ReminderScheduler:
+    def __init__(self, scheduler, send_reminders):
+        self.scheduler = scheduler
+        self.send_reminders = send_reminders
+        self._signature = None
+
+    @staticmethod
+    def job_id(event_id: int) -> str:
+        return f"{REMINDER_JOB_PREFIX}{event_id}"
+
+    @staticmethod
+    def retry_job_id(event_id: int) -> str:
+        return f"{RETRY_JOB_PREFIX}{event_id}"
+
+    def schedule(self, event: Event, now_utc: datetime = None) -> Optional[datetime]:
+        due_at = reminder_due_at(event, now_utc or datetime.now(timezone.utc))
+        if due_at is None:
+            self.cancel(event.id)
+            return None
+        retry = self.scheduler.get_job(self.retry_job_id(event.id))
+        if retry is not None and retry.next_run_time is not None and due_at <= retry.next_run_time:
+            self._remove(self.job_id(event.id))
+            logger.debug(f"Reminder for event {event.id} is left to its pending retry at {retry.next_run_time.isoformat()}")
+            return retry.next_run_time
+        self._remove(self.retry_job_id(event.id))
+        self.scheduler.add_job(
+            self.send_reminders, 'date', run_date=due_at, args=[event.id],
+            id=self.job_id(event.id), replace_existing=True,
+            misfire_grace_time=None, coalesce=True
+        )
+        logger.debug(f"Reminder for event {event.id} scheduled at {due_at.isoformat()}")
+        return due_at
+
+    def schedule_retry(self, event_id: int, attempt: int) -> Optional[datetime]:
+        if attempt > Config.REMINDER_MAX_RETRIES:
+            logger.error(f"Reminders for event {event_id} failed after {Config.REMINDER_MAX_RETRIES} retries, giving up")
+            return None
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=Config.REMINDER_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        self._remove(self.job_id(event_id))
+        self.scheduler.add_job(
+            self.send_reminders, 'date', run_date=retry_at, args=[event_id, attempt],
+            id=self.retry_job_id(event_id), replace_existing=True,
+            misfire_grace_time=None, coalesce=True
+        )
+        logger.warning(f"Reminders for event {event_id} will be retried at {retry_at.isoformat()} (attempt {attempt})")
+        return retry_at
+
+    def _remove(self, job_id: str) -> bool:
+        try:
+            self.scheduler.remove_job(job_id)
+            return True
+        except JobLookupError:
+            return False
+
+    def cancel(self, event_id: int):
+        removed = self._remove(self.job_id(event_id))
+        if self._remove(self.retry_job_id(event_id)) or removed:
+            logger.debug(f"Reminder for event {event_id} cancelled")
+
+    @staticmethod
+    def schedule_signature() -> tuple:
+        last_event_update = db.session.query(func.max(Event.updated_at)).scalar()
+        last_participation_id = db.session.query(func.max(Participation.id)).scalar()
+        return last_event_update, last_participation_id
+
+    def refresh_if_changed(self) -> bool:
+        if self.schedule_signature() == self._signature:
+            return False
+        self.rebuild()
+        return True
+
+    def rebuild(self) -> int:
+        self._signature = self.schedule_signature()
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith(REMINDER_JOB_PREFIX):
+                job.remove()
+
+        now_utc = datetime.now(timezone.utc)
+        events = Event.query.options(load_only(Event.id, Event.start_datetime, Event.status)).filter(
+            Event.status == EventStatus.UPCOMING,
+            Event.start_datetime >= now_utc + REMINDER_WINDOW_START
+        ).all()
+        scheduled = sum(1 for event in events if self.schedule(event, now_utc) is not None)
+        upcoming_retry_ids = {self.retry_job_id(event.id) for event in events}
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith(RETRY_JOB_PREFIX) and job.id not in upcoming_retry_ids:
+                job.remove()
+        logger.info(f"Reminder schedule rebuilt: {scheduled} events scheduled.")
+        return scheduled
+
+
+_reminder_scheduler = None
+
+def install_reminder_scheduler(scheduler, send_reminders) -> ReminderScheduler:
+    global _reminder_scheduler
+    _reminder_scheduler = ReminderScheduler(scheduler, send_reminders)
+    return _reminder_scheduler
+
+def schedule_event_reminder(event: Event):
+    if _reminder_scheduler is None:
+        return
+    try:
+        _reminder_scheduler.schedule(event)
+    except Exception as e:
+        logger.error(f"Could not schedule reminder for event {event.id}: {e}", exc_info=True)
+
+def cancel_event_reminder(event_id: int):
+    if _reminder_scheduler is not None:
+        _reminder_scheduler.cancel(event_id)
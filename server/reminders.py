@@ -0,0 +1,47 @@
+import pytz
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from models import Event, EventStatus, User, Participation
+
+REMINDER_WINDOW_START = timedelta(hours=20)
+REMINDER_WINDOW_END = timedelta(hours=28)
+
+def to_krasnoyarsk_time(dt_utc: datetime) -> datetime:
+    krasnoyarsk_tz = pytz.timezone('Asia/Krasnoyarsk')
+    if dt_utc.tzinfo is None:
+        dt_utc = dt_utc.replace(tzinfo=timezone.utc)
+    return dt_utc.astimezone(krasnoyarsk_tz)
+
+def local_start_time(event: Event) -> str:
+    return to_krasnoyarsk_time(event.start_datetime).strftime('%d.%m.%Y в %H:%M')
+
+def reminder_message(event: Event) -> str:
+    return f"Напоминание: Мероприятие «{event.title}» начнется {local_start_time(event)}."
+
+def reminder_window(now_utc: datetime):
+    return now_utc + REMINDER_WINDOW_START, now_utc + REMINDER_WINDOW_END
+
+def upcoming_events_to_notify_query(now_utc: datetime, event_id: Optional[int] = None):
+    window_start, window_end = reminder_window(now_utc)
+    query = Event.query.filter(
+        Event.start_datetime >= window_start,
+        Event.start_datetime <= window_end,
+        Event.status == EventStatus.UPCOMING,
+        Event.notification_sent_at.is_(None) 
+    )
+    if event_id is not None:
+        query = query.filter(Event.id == event_id)
+    return query
+
+def upcoming_participations_to_notify_query(now_utc: datetime, event_id: Optional[int] = None):
+    window_start, window_end = reminder_window(now_utc)
+    query = Participation.query.join(Event).join(User, Participation.user_id == User.id).filter(
+        Event.start_datetime >= window_start,
+        Event.start_datetime <= window_end,
+        Event.status == EventStatus.UPCOMING,
+        User.notifications_enabled == True,
+        Participation.reminder_sent_at.is_(None)
+    )
+    if event_id is not None:
+        query = query.filter(Participation.event_id == event_id)
+    return query
@@ -0,0 +1,135 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import update, or_, case, func
+from sqlalchemy.exc import IntegrityError
+from models import db, SchedulerLease
+
+logger = logging.getLogger(__name__)
+
+def make_holder_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def try_acquire_lease(name: str, holder: str, ttl_seconds: int) -> bool:
+    now_utc = datetime.now(timezone.utc)
+    expires_at = now_utc + timedelta(seconds=ttl_seconds)
+    result = db.session.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now_utc)
+        )
+        .values(
+            holder=holder,
+            acquired_at=case((SchedulerLease.holder == holder, SchedulerLease.acquired_at), else_=now_utc),
+            renewed_at=now_utc,
+            expires_at=expires_at
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount == 1:
+        return True
+
+    lease_exists = db.session.query(func.count(SchedulerLease.name)).filter(SchedulerLease.name == name).scalar()
+    if lease_exists:
+        return False
+
+    db.session.add(SchedulerLease(name=name, holder=holder, acquired_at=now_utc, renewed_at=now_utc, expires_at=expires_at))
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+def release_lease(name: str, holder: str) -> bool:
+    result = db.session.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+        .values(expires_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+def get_lease(name: str) -> Optional[SchedulerLease]:
+    return SchedulerLease.query.filter_by(name=name).populate_existing().first()
+
+
+class LeaderElection:
+    def __init__(self, app, name: str, ttl_seconds: int, heartbeat_seconds: float, on_elected, on_demoted, on_heartbeat=None):
+        self.app = app
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.on_heartbeat = on_heartbeat
+        self.holder = make_holder_id()
+        self._is_leader = False
+        self._renewed_at = 0.0
+        self._stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"leader-election-{self.name}", daemon=True)
+        self._thread.start()
+        logger.info(f"Leader election for '{self.name}' started as {self.holder}.")
+
+    def stop(self, timeout: float = 5):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+        if self._is_leader:
+            with self.app.app_context():
+                self._demote()
+                release_lease(self.name, self.holder)
+
+    def _elect(self):
+        self._is_leader = True
+        logger.info(f"{self.holder} acquired lease '{self.name}', running scheduled jobs.")
+        self.on_elected()
+
+    def _demote(self):
+        self._is_leader = False
+        logger.warning(f"{self.holder} lost lease '{self.name}', scheduled jobs paused.")
+        self.on_demoted()
+
+    def heartbeat(self):
+        try:
+            acquired = try_acquire_lease(self.name, self.holder, self.ttl_seconds)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Lease '{self.name}' heartbeat failed: {e}", exc_info=True)
+            if self._is_leader and time.monotonic() - self._renewed_at >= self.ttl_seconds:
+                self._demote()
+            return
+
+        if acquired:
+            self._renewed_at = time.monotonic()
+            if not self._is_leader:
+                self._elect()
+            elif self.on_heartbeat:
+                self.on_heartbeat()
+        elif self._is_leader:
+            self._demote()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            with self.app.app_context():
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Leader election error for '{self.name}': {e}", exc_info=True)
+            self._stopping.wait(self.heartbeat_seconds)
@@ -0,0 +1,200 @@
+import logging
+import re
+from sqlalchemy import or_, text, inspect, Integer, Float
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from models import db, Event
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'event_search'
+
+def _search_tokens(term: str) -> list:
+    return re.findall(r'\w+', term.lower())
+
+
+class LikeSearchBackend:
+    name = 'like'
+
+    def ensure_schema(self):
+        pass
+
+    def is_ready(self) -> bool:
+        return True
+
+    def index_event(self, event):
+        pass
+
+    def remove_event(self, event_id):
+        pass
+
+    def rebuild(self) -> int:
+        return 0
+
+    def apply(self, query, term: str):
+        search_pattern = f"%{term}%"
+        return query.filter(or_(Event.title.ilike(search_pattern), Event.description.ilike(search_pattern))), None
+
+
+class SqliteFtsSearchBackend:
+    name = 'sqlite-fts5'
+
+    def __init__(self):
+        self._ready = False
+
+    def ensure_schema(self):
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            f"USING fts5(title, description, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+        db.session.commit()
+        self._ready = True
+
+    def is_ready(self) -> bool:
+        if not self._ready:
+            self._ready = inspect(db.engine).has_table(SEARCH_TABLE)
+        return self._ready
+
+    def index_event(self, event):
+        self.remove_event(event.id)
+        db.session.execute(
+            text(f"INSERT INTO {SEARCH_TABLE} (rowid, title, description) VALUES (:id, :title, :description)"),
+            {'id': event.id, 'title': event.title, 'description': event.description}
+        )
+
+    def remove_event(self, event_id):
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), {'id': event_id})
+
+    def rebuild(self) -> int:
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+        result = db.session.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, description) SELECT id, title, description FROM event"
+        ))
+        db.session.commit()
+        return result.rowcount
+
+    def apply(self, query, term: str):
+        tokens = _search_tokens(term)
+        match_expression = ' '.join(f'"{token}"*' for token in tokens)
+        ranked = text(
+            f"SELECT rowid AS event_id, bm25({SEARCH_TABLE}, 10.0, 1.0) AS rank "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match"
+        ).bindparams(match=match_expression).columns(event_id=Integer, rank=Float).subquery('search_rank')
+        return query.join(ranked, ranked.c.event_id == Event.id), ranked.c.rank
+
+
+class PostgresSearchBackend:
+    name = 'postgresql-tsvector'
+
+    def __init__(self, ts_config: str):
+        self.ts_config = ts_config
+        self._ready = False
+
+    def ensure_schema(self):
+        db.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            f"event_id INTEGER PRIMARY KEY REFERENCES event (id) ON DELETE CASCADE, "
+            f"document TSVECTOR NOT NULL)"
+        ))
+        db.session.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)"
+        ))
+        db.session.commit()
+        self._ready = True
+
+    def is_ready(self) -> bool:
+        if not self._ready:
+            self._ready = inspect(db.engine).has_table(SEARCH_TABLE)
+        return self._ready
+
+    def index_event(self, event):
+        db.session.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} (event_id, document) VALUES (:id, "
+                f"setweight(to_tsvector(CAST(:cfg AS regconfig), :title), 'A') || "
+                f"setweight(to_tsvector(CAST(:cfg AS regconfig), :description), 'B')) "
+                f"ON CONFLICT (event_id) DO UPDATE SET document = EXCLUDED.document"
+            ),
+            {'id': event.id, 'cfg': self.ts_config, 'title': event.title, 'description': event.description}
+        )
+
+    def remove_event(self, event_id):
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE event_id = :id"), {'id': event_id})
+
+    def rebuild(self) -> int:
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+        result = db.session.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} (event_id, document) SELECT id, "
+                f"setweight(to_tsvector(CAST(:cfg AS regconfig), title), 'A') || "
+                f"setweight(to_tsvector(CAST(:cfg AS regconfig), description), 'B') FROM event"
+            ),
+            {'cfg': self.ts_config}
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def apply(self, query, term: str):
+        tokens = _search_tokens(term)
+        ts_query = ' & '.join(f"{token}:*" for token in tokens)
+        ranked = text(
+            f"SELECT event_id, -ts_rank(document, to_tsquery(CAST(:cfg AS regconfig), :ts_query)) AS rank "
+            f"FROM {SEARCH_TABLE} WHERE document @@ to_tsquery(CAST(:cfg AS regconfig), :ts_query)"
+        ).bindparams(cfg=self.ts_config, ts_query=ts_query).columns(event_id=Integer, rank=Float).subquery('search_rank')
+        return query.join(ranked, ranked.c.event_id == Event.id), ranked.c.rank
+
+
+_backends = {}
+_like_backend = LikeSearchBackend()
+
+def _create_backend(dialect_name: str):
+    if Config.SEARCH_BACKEND == 'like':
+        return _like_backend
+    if dialect_name == 'sqlite':
+        return SqliteFtsSearchBackend()
+    if dialect_name == 'postgresql':
+        return PostgresSearchBackend(Config.SEARCH_TS_CONFIG)
+    logger.warning(f"Full-text search is not supported for dialect '{dialect_name}', falling back to ILIKE search.")
+    return _like_backend
+
+def get_search_backend():
+    engine = db.engine
+    backend = _backends.get(engine.url)
+    if backend is None:
+        backend = _backends[engine.url] = _create_backend(engine.dialect.name)
+    return backend
+
+def _active_backend():
+    backend = get_search_backend()
+    if backend.is_ready():
+        return backend
+    logger.warning(f"Search index table '{SEARCH_TABLE}' is missing, run 'flask rebuild-search-index'. Using ILIKE search.")
+    return _like_backend
+
+def ensure_search_schema():
+    backend = get_search_backend()
+    try:
+        backend.ensure_schema()
+    except (OperationalError, ProgrammingError) as e:
+        db.session.rollback()
+        logger.error(f"Could not create search index for backend '{backend.name}': {e}", exc_info=True)
+        _backends[db.engine.url] = _like_backend
+        return _like_backend
+    return backend
+
+def rebuild_search_index() -> int:
+    backend = ensure_search_schema()
+    indexed = backend.rebuild()
+    logger.info(f"Search index '{backend.name}' rebuilt: {indexed} events indexed.")
+    return indexed
+
+def index_event(event):
+    _active_backend().index_event(event)
+
+def remove_event_from_index(event_id):
+    _active_backend().remove_event(event_id)
+
+def apply_search(query, term: str):
+    if not _search_tokens(term):
+        return _like_backend.apply(query, term)
+    return _active_backend().apply(query, term)
@@ -0,0 +1,22 @@
+from flask import Response, current_app, stream_with_context
+from config import Config
+
+def wants_stream(args) -> bool:
+    return args.get('stream', 'false').lower() == 'true'
+
+def stream_json_items(items) -> Response:
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield '['
+        separator = ''
+        for item in items:
+            yield separator + dumps(item)
+            separator = ','
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def stream_json_array(query, serialize, batch_size: int = None) -> Response:
+    batch_size = batch_size or Config.STREAM_BATCH_SIZE
+    return stream_json_items(serialize(row) for row in query.yield_per(batch_size))
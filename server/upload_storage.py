@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import os
+import re
+import uuid
+from typing import Optional
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
+from models import db, StoredFile
+from config import Config
+from images import variant_filenames, delete_upload_files
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 64 * 1024
+IMMUTABLE_UPLOAD_MAX_AGE = 365 * 24 * 3600
+EXTENSION_ALIASES = {'jpeg': 'jpg'}
+IMMUTABLE_NAME = re.compile(r'^[0-9a-f]{64}(-[a-z]+-[a-z]+)?\.[a-z0-9]+$')
+
+def is_immutable_upload(filename: str) -> bool:
+    return bool(IMMUTABLE_NAME.match(filename))
+
+def _stored_name(digest: str, extension: str) -> str:
+    stored = db.session.query(StoredFile.name).filter(StoredFile.sha256 == digest).first()
+    return stored.name if stored else f"{digest}.{extension}"
+
+def _retain(filename: str, digest: str, size: int):
+    retained = db.session.execute(
+        update(StoredFile)
+        .where(StoredFile.name == filename)
+        .values(ref_count=StoredFile.ref_count + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if retained:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(StoredFile(name=filename, sha256=digest, size=size, ref_count=1))
+    except IntegrityError:
+        _retain(filename, digest, size)
+
+def _delete_stored_files(filename: str):
+    delete_upload_files([filename] + variant_filenames(os.path.splitext(filename)[0]))
+    db.session.execute(
+        delete(StoredFile).where(StoredFile.name == filename).execution_options(synchronize_session=False)
+    )
+
+def save_upload(file_storage, extension: str) -> str:
+    extension = EXTENSION_ALIASES.get(extension, extension)
+    os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+    partial_path = os.path.join(Config.UPLOAD_FOLDER, f"{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(partial_path, 'wb') as partial:
+            while True:
+                chunk = file_storage.stream.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                partial.write(chunk)
+                size += len(chunk)
+        filename = _stored_name(digest.hexdigest(), extension)
+        _retain(filename, digest.hexdigest(), size)
+        target_path = os.path.join(Config.UPLOAD_FOLDER, filename)
+        if os.path.exists(target_path):
+            os.remove(partial_path)
+            logger.info(f"Upload matches stored file {filename}, reusing it")
+        else:
+            os.replace(partial_path, target_path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return f"/uploads/{filename}"
+
+def discard_upload(url: Optional[str]):
+    if not url:
+        return
+    filename = os.path.basename(url)
+    try:
+        with db.session.begin_nested():
+            db.session.add(StoredFile(name=filename, sha256=os.path.splitext(filename)[0][:64], size=0, ref_count=0))
+    except IntegrityError:
+        db.session.rollback()
+        return
+    try:
+        _delete_stored_files(filename)
+        db.session.commit()
+        logger.info(f"Deleted unreferenced upload {filename} and its variants")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error discarding upload {url}: {e}", exc_info=True)
+
+def release_upload(url: Optional[str]):
+    if not url:
+        return
+    filename = os.path.basename(url)
+    try:
+        released = db.session.execute(
+            update(StoredFile)
+            .where(StoredFile.name == filename)
+            .values(ref_count=StoredFile.ref_count - 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not released:
+            db.session.rollback()
+            discard_upload(url)
+            return
+        remaining = db.session.query(StoredFile.ref_count).filter(StoredFile.name == filename).scalar()
+        if remaining > 0:
+            db.session.commit()
+            logger.info(f"Released reference to {filename}, file is still in use")
+            return
+        _delete_stored_files(filename)
+        db.session.commit()
+        logger.info(f"Deleted upload {filename} and its variants")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error releasing upload {url}: {e}", exc_info=True)
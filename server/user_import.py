@@ -0,0 +1,96 @@
+import csv
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from flask import current_app
+from sqlalchemy import select, insert, or_
+from models import db, bcrypt, User
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ('username', 'email', 'password')
+USERNAME_MAX_LENGTH = User.__table__.c.username.type.length
+EMAIL_MAX_LENGTH = User.__table__.c.email.type.length
+
+def _hash_password(password: str, rounds: int) -> str:
+    return bcrypt.generate_password_hash(password, rounds).decode('utf-8')
+
+def read_user_rows(csv_file):
+    reader = csv.DictReader(csv_file)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+    for row in reader:
+        yield {column: (row.get(column) or '').strip() for column in REQUIRED_COLUMNS}
+
+def _is_valid(row: dict) -> bool:
+    return (
+        all(row.values())
+        and '@' in row['email']
+        and len(row['username']) <= USERNAME_MAX_LENGTH
+        and len(row['email']) <= EMAIL_MAX_LENGTH
+    )
+
+def _taken_names(rows: list) -> tuple:
+    taken = db.session.execute(
+        select(User.email, User.username).where(or_(
+            User.email.in_({row['email'] for row in rows}),
+            User.username.in_({row['username'] for row in rows})
+        ))
+    ).all()
+    return {email for email, _ in taken}, {username for _, username in taken}
+
+def _filter_new_users(rows: list, report: dict) -> list:
+    valid = [row for row in rows if _is_valid(row)]
+    report['invalid'] += len(rows) - len(valid)
+    if not valid:
+        return []
+    taken_emails, taken_usernames = _taken_names(valid)
+    fresh = []
+    for row in valid:
+        if row['email'] in taken_emails or row['username'] in taken_usernames:
+            report['skipped'] += 1
+            continue
+        taken_emails.add(row['email'])
+        taken_usernames.add(row['username'])
+        fresh.append(row)
+    return fresh
+
+def import_users(csv_file, chunk_size: int = None, workers: int = None, on_chunk=None) -> dict:
+    chunk_size = chunk_size or Config.USER_IMPORT_CHUNK_SIZE
+    workers = workers or Config.USER_IMPORT_WORKERS or os.cpu_count() or 1
+    hash_password = partial(_hash_password, rounds=current_app.config.get('BCRYPT_LOG_ROUNDS', 12))
+    started = time.monotonic()
+    report = {'read': 0, 'created': 0, 'skipped': 0, 'invalid': 0, 'chunks': 0, 'workers': workers}
+
+    rows = read_user_rows(csv_file)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            report['read'] += len(chunk)
+            fresh = _filter_new_users(chunk, report)
+            if fresh:
+                password_hashes = pool.map(hash_password, [row['password'] for row in fresh], chunksize=max(1, len(fresh) // (workers * 4)))
+                db.session.execute(insert(User), [
+                    {'username': row['username'], 'email': row['email'], 'password_hash': password_hash}
+                    for row, password_hash in zip(fresh, password_hashes)
+                ])
+                db.session.commit()
+            report['created'] += len(fresh)
+            report['chunks'] += 1
+            if on_chunk:
+                on_chunk(report)
+
+    report['duration_seconds'] = round(time.monotonic() - started, 3)
+    report['users_per_second'] = round(report['created'] / report['duration_seconds'], 1) if report['duration_seconds'] else 0.0
+    logger.info(
+        f"User import: {report['created']} created, {report['skipped']} skipped, {report['invalid']} invalid "
+        f"of {report['read']} rows in {report['duration_seconds']}s ({report['users_per_second']} users/s)."
+    )
+    return report